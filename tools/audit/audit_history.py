@@ -0,0 +1,299 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Append-only history of readiness audit runs (SQLite) and a small query CLI.
+
+audit_readiness.py appends every one-shot run and every --watch pass to
+tools/audit/reports/readiness.db. Check names, levels, messages and probe names are
+interned, so a result row is a handful of integers. Results are indexed by
+(check, ts), and level changes are also written to a transitions table, so flapping
+and time-since-PASS queries never scan the raw results.
+
+    python3 tools/audit/audit_history.py flapping --since 7d
+    python3 tools/audit/audit_history.py last-pass 'kubernetes/*'
+    python3 tools/audit/audit_history.py levels 'port:15672' --since 30d
+    python3 tools/audit/audit_history.py history external-secrets
+    python3 tools/audit/audit_history.py latency --since 24h
+
+Check patterns are globs on the check name or "section-slug/check".
+No third-party deps. Python 3.8+.
+"""
+import argparse, fnmatch, json, re, sqlite3, sys, time
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+DEFAULT_DB = "tools/audit/reports/readiness.db"
+LEVELS = ("PASS","WARN","FAIL","TIMEOUT","SKIP")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS checks (id INTEGER PRIMARY KEY, section TEXT NOT NULL, name TEXT NOT NULL, UNIQUE(section, name));
+CREATE TABLE IF NOT EXISTS levels (id INTEGER PRIMARY KEY, level TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS messages (id INTEGER PRIMARY KEY, text TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS probes (id INTEGER PRIMARY KEY, name TEXT NOT NULL UNIQUE);
+CREATE TABLE IF NOT EXISTS runs (id INTEGER PRIMARY KEY, ts INTEGER NOT NULL, source TEXT NOT NULL, dry INTEGER NOT NULL);
+CREATE TABLE IF NOT EXISTS results (run INTEGER NOT NULL, check_id INTEGER NOT NULL, ts INTEGER NOT NULL,
+                                    level INTEGER NOT NULL, message INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS results_check_ts ON results(check_id, ts);
+CREATE TABLE IF NOT EXISTS transitions (check_id INTEGER NOT NULL, ts INTEGER NOT NULL, prev_ts INTEGER,
+                                        from_level INTEGER, to_level INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS transitions_check_ts ON transitions(check_id, ts);
+CREATE TABLE IF NOT EXISTS timings (run INTEGER NOT NULL, probe_id INTEGER NOT NULL, ts INTEGER NOT NULL,
+                                    seconds REAL NOT NULL, rc INTEGER, timeout INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS timings_probe_ts ON timings(probe_id, ts);
+"""
+
+def slug(section:str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", section.lower()).strip("-")
+
+class ReportStore:
+    """SQLite store; timestamps are integer milliseconds since the epoch.
+
+    Appends are one transaction each. Interned ids and each check's last level are
+    kept in memory, so an append costs one insert per result (plus one per level
+    change) regardless of how much history is stored. Safe to share between a watch
+    process and cron runs (WAL mode, busy timeout).
+    """
+    def __init__(self, path:Path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self.db = sqlite3.connect(str(path), timeout=10, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+        self.db.executemany("INSERT OR IGNORE INTO levels(level) VALUES (?)", [(l,) for l in LEVELS])
+        self.db.commit()
+        self.level_ids = {l: i for i, l in self.db.execute("SELECT id, level FROM levels")}
+        self.probe_ids = {n: i for i, n in self.db.execute("SELECT id, name FROM probes")}
+        self.message_ids: Dict[str, int] = {}
+        self._load_last()
+
+    def _load_last(self) -> None:
+        """(Re)read check ids and each check's latest level; needed again only when
+        another process appended since our last run."""
+        self.check_ids = {(s, n): i for i, s, n in self.db.execute("SELECT id, section, name FROM checks")}
+        self.last: Dict[int, Tuple[int, int]] = {}  # check id -> (level id, ts) of its latest result
+        for cid in self.check_ids.values():
+            row = self.db.execute("SELECT level, ts FROM results WHERE check_id=? ORDER BY ts DESC LIMIT 1", (cid,)).fetchone()
+            if row:
+                self.last[cid] = row
+        self.head = self.db.execute("SELECT MAX(id) FROM runs").fetchone()[0]
+
+    def _intern(self, staged:Dict[str, Dict], cache:str, table:str, cols:Sequence[str], key:Tuple) -> int:
+        """Id for `key` in `table`, inserting it if needed. New ids go to `staged[cache]`
+        and reach the `self.<cache>` dict only once the transaction commits."""
+        k = key if len(key) > 1 else key[0]
+        known = getattr(self, cache)
+        if k in known:
+            return known[k]
+        new = staged.setdefault(cache, {})
+        if k not in new:
+            where = " AND ".join(f"{c}=?" for c in cols)
+            self.db.execute(f"INSERT OR IGNORE INTO {table}({','.join(cols)}) VALUES ({','.join('?'*len(cols))})", key)
+            new[k] = self.db.execute(f"SELECT id FROM {table} WHERE {where}", key).fetchone()[0]
+        return new[k]
+
+    def append(self, sections:Mapping[str, Iterable[Tuple[str, Mapping[str,str]]]], source:str="oneshot",
+               dry:bool=False, timings:Iterable[Mapping]=(), ts:Optional[int]=None) -> int:
+        """Record one run: {section: [(check, {"level","message",...})]} plus probe timings
+        (Profiler records: probe, seconds, rc, timeout). Returns the run id."""
+        ts = int(time.time()*1000) if ts is None else ts
+        if len(self.message_ids) > 100000:
+            self.message_ids.clear()
+        # ids and latest levels are staged here and only cached after COMMIT, so a
+        # rolled-back append leaves the in-memory state matching the database
+        staged: Dict[str, Dict] = {}
+        last: Dict[int, Tuple[int, int]] = {}
+        with self.db:
+            self.db.execute("BEGIN IMMEDIATE")
+            if self.db.execute("SELECT MAX(id) FROM runs").fetchone()[0] != self.head:
+                self._load_last()
+            run = self.db.execute("INSERT INTO runs(ts, source, dry) VALUES (?,?,?)", (ts, source, int(dry))).lastrowid
+            rows, changes = [], []
+            for section, items in sections.items():
+                for check, st in items:
+                    cid = self._intern(staged, "check_ids", "checks", ("section","name"), (section, check))
+                    lid = self._intern(staged, "level_ids", "levels", ("level",), (st["level"],))
+                    mid = self._intern(staged, "message_ids", "messages", ("text",), (st.get("message",""),))
+                    rows.append((run, cid, ts, lid, mid))
+                    prev = last[cid] if cid in last else self.last.get(cid)
+                    if prev is None or prev[0] != lid:
+                        changes.append((cid, ts, prev[1] if prev else None, prev[0] if prev else None, lid))
+                    last[cid] = (lid, ts)
+            self.db.executemany("INSERT INTO results(run, check_id, ts, level, message) VALUES (?,?,?,?,?)", rows)
+            self.db.executemany("INSERT INTO transitions(check_id, ts, prev_ts, from_level, to_level) VALUES (?,?,?,?,?)", changes)
+            self.db.executemany("INSERT INTO timings(run, probe_id, ts, seconds, rc, timeout) VALUES (?,?,?,?,?,?)",
+                                [(run, self._intern(staged, "probe_ids", "probes", ("name",), (t["probe"],)), ts,
+                                  t["seconds"], t["rc"], int(bool(t["timeout"]))) for t in timings])
+        for cache, ids in staged.items():
+            getattr(self, cache).update(ids)
+        self.last.update(last)
+        self.head = run
+        return run
+
+    def close(self) -> None:
+        self.db.close()
+
+    # -------- queries --------
+    def match(self, patterns:Sequence[str]) -> Dict[int, str]:
+        """{check id: "section-slug/check"} for checks matching any glob (all when empty)."""
+        out: Dict[int, str] = {}
+        for (section, name), cid in self.check_ids.items():
+            full = f"{slug(section)}/{name}"
+            if not patterns or any(fnmatch.fnmatchcase(k, p.lower()) for p in patterns for k in (full, name.lower())):
+                out[cid] = full
+        return dict(sorted(out.items(), key=lambda kv: kv[1]))
+
+    def level_name(self, lid:Optional[int]) -> str:
+        return next((l for l, i in self.level_ids.items() if i == lid), "-")
+
+    def flapping(self, since:int, min_changes:int=2, patterns:Sequence[str]=()) -> List[dict]:
+        names = self.match(patterns)
+        rows = self.db.execute("SELECT check_id, COUNT(*), MAX(ts) FROM transitions WHERE ts >= ? AND from_level IS NOT NULL "
+                               "GROUP BY check_id HAVING COUNT(*) >= ? ORDER BY COUNT(*) DESC", (since, min_changes))
+        return [{"check": names[cid], "changes": n, "last_change": last,
+                 "level": self.level_name(self.last.get(cid, (None,))[0])} for cid, n, last in rows if cid in names]
+
+    def last_pass(self, patterns:Sequence[str]=()) -> List[dict]:
+        out = []
+        pass_id = self.level_ids["PASS"]
+        for cid, name in self.match(patterns).items():
+            lid, ts = self.last.get(cid, (None, None))
+            if lid is None:
+                continue
+            since = self.db.execute("SELECT ts FROM transitions WHERE check_id=? ORDER BY ts DESC LIMIT 1", (cid,)).fetchone()
+            if lid == pass_id:
+                last_pass = ts
+            else:
+                row = self.db.execute("SELECT prev_ts FROM transitions WHERE check_id=? AND from_level=? ORDER BY ts DESC LIMIT 1",
+                                      (cid, pass_id)).fetchone()
+                last_pass = row[0] if row else None
+            out.append({"check": name, "level": self.level_name(lid), "since": since[0] if since else ts,
+                        "last_pass": last_pass, "last_seen": ts})
+        return out
+
+    def levels(self, since:int, patterns:Sequence[str]=()) -> List[dict]:
+        out = []
+        for cid, name in self.match(patterns).items():
+            counts = dict(self.db.execute("SELECT level, COUNT(*) FROM results WHERE check_id=? AND ts >= ? GROUP BY level", (cid, since)))
+            if counts:
+                out.append({"check": name, **{l: counts.get(i, 0) for l, i in self.level_ids.items()}})
+        return out
+
+    def history(self, since:int, patterns:Sequence[str]=()) -> List[dict]:
+        out = []
+        for cid, name in self.match(patterns).items():
+            for ts, prev_ts, frm, to in self.db.execute("SELECT ts, prev_ts, from_level, to_level FROM transitions "
+                                                        "WHERE check_id=? AND ts >= ? ORDER BY ts", (cid, since)):
+                msg = self.db.execute("SELECT m.text FROM results r JOIN messages m ON m.id=r.message "
+                                      "WHERE r.check_id=? AND r.ts=? LIMIT 1", (cid, ts)).fetchone()
+                out.append({"ts": ts, "check": name, "from": self.level_name(frm),
+                            "to": self.level_name(to), "message": msg[0] if msg else ""})
+        return sorted(out, key=lambda r: r["ts"])
+
+    def latency(self, since:int, patterns:Sequence[str]=(), percentiles:Sequence[int]=(50, 90, 99)) -> List[dict]:
+        out = []
+        for name, pid in sorted(self.probe_ids.items()):
+            if patterns and not any(fnmatch.fnmatchcase(name, p) for p in patterns):
+                continue
+            secs = [s for s, in self.db.execute("SELECT seconds FROM timings WHERE probe_id=? AND ts >= ? ORDER BY seconds", (pid, since))]
+            if not secs:
+                continue
+            timeouts = self.db.execute("SELECT COUNT(*) FROM timings WHERE probe_id=? AND ts >= ? AND timeout", (pid, since)).fetchone()[0]
+            row = {"probe": name, "count": len(secs), "timeouts": timeouts}
+            row.update({f"p{p}": secs[min(len(secs)-1, int(len(secs)*p/100))] for p in percentiles})
+            row["max"] = secs[-1]
+            out.append(row)
+        return sorted(out, key=lambda r: -r[f"p{percentiles[-1]}"])
+
+# -------- CLI --------
+def parse_since(v:str) -> int:
+    """'7d', '12h', '30m', '90s' or 'all' -> epoch milliseconds."""
+    if v == "all":
+        return 0
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)([smhdw])", v)
+    if not m:
+        raise argparse.ArgumentTypeError(f"expected e.g. 7d, 12h, 30m or all, got {v!r}")
+    unit = {"s":1, "m":60, "h":3600, "d":86400, "w":604800}[m.group(2)]
+    return int((time.time() - float(m.group(1))*unit) * 1000)
+
+def fmt_ts(ms:Optional[int]) -> str:
+    return datetime.fromtimestamp(ms/1000).strftime("%Y-%m-%d %H:%M:%S") if ms else "never"
+
+def fmt_ago(ms:Optional[int]) -> str:
+    if not ms:
+        return "never"
+    s = max(0, int(time.time() - ms/1000))
+    for unit, n in (("d", 86400), ("h", 3600), ("m", 60)):
+        if s >= n:
+            return f"{s//n}{unit} ago"
+    return f"{s}s ago"
+
+def print_table(rows:List[dict], cols:Sequence[Tuple[str, str]]) -> None:
+    if not rows:
+        print("(no data)")
+        return
+    cells = [[h for _, h in cols]] + [[str(r[k]) for k, _ in cols] for r in rows]
+    widths = [max(len(c[i]) for c in cells) for i in range(len(cols))]
+    for line in cells:
+        print("  ".join(c.ljust(w) for c, w in zip(line, widths)).rstrip())
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Query the readiness audit history store.")
+    ap.add_argument("--db", default=DEFAULT_DB, help=f"store path (default {DEFAULT_DB})")
+    ap.add_argument("--json", action="store_true", help="print JSON rows instead of a table")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    p = sub.add_parser("flapping", help="checks whose level changed most often")
+    p.add_argument("checks", nargs="*")
+    p.add_argument("--since", type=parse_since, default="7d")
+    p.add_argument("--min-changes", type=int, default=2)
+    p = sub.add_parser("last-pass", help="current level, since when, and when each check last passed")
+    p.add_argument("checks", nargs="*")
+    p = sub.add_parser("levels", help="how many runs ended at each level")
+    p.add_argument("checks", nargs="*")
+    p.add_argument("--since", type=parse_since, default="30d")
+    p = sub.add_parser("history", help="level transitions in time order")
+    p.add_argument("checks", nargs="*")
+    p.add_argument("--since", type=parse_since, default="all")
+    p = sub.add_parser("latency", help="per-probe latency percentiles (needs probe timings in the store)")
+    p.add_argument("probes", nargs="*", help="globs on the probe name, e.g. 'kubectl*'")
+    p.add_argument("--since", type=parse_since, default="7d")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+    if not Path(args.db).is_file():
+        print(f"{args.db}: no history yet (run audit_readiness.py first)", file=sys.stderr); sys.exit(1)
+    store = ReportStore(Path(args.db))
+    if args.cmd == "flapping":
+        rows = store.flapping(args.since, args.min_changes, args.checks)
+        cols = [("check","Check"), ("changes","Changes"), ("level","Now"), ("last_change","Last change")]
+    elif args.cmd == "last-pass":
+        rows = store.last_pass(args.checks)
+        cols = [("check","Check"), ("level","Now"), ("since","Since"), ("last_pass","Last PASS")]
+    elif args.cmd == "levels":
+        rows = store.levels(args.since, args.checks)
+        cols = [("check","Check")] + [(l, l) for l in LEVELS]
+    elif args.cmd == "history":
+        rows = store.history(args.since, args.checks)
+        cols = [("ts","When"), ("check","Check"), ("from","From"), ("to","To"), ("message","Message")]
+    else:
+        rows = store.latency(args.since, args.probes)
+        cols = [("probe","Probe"), ("count","Runs"), ("timeouts","Timeouts"), ("p50","p50 s"), ("p90","p90 s"), ("p99","p99 s"), ("max","max s")]
+    store.close()
+    if args.json:
+        for r in rows:
+            print(json.dumps(r))
+        return
+    for r in rows:
+        for k in ("last_change", "since", "ts"):
+            if k in r:
+                r[k] = fmt_ts(r[k])
+        if "last_pass" in r:
+            r["last_pass"] = fmt_ago(r["last_pass"])
+        for k in ("p50", "p90", "p99", "max"):
+            if k in r:
+                r[k] = f"{r[k]:.3f}"
+    print_table(rows, cols)
+
+if __name__=="__main__":
+    main()
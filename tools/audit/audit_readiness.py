@@ -2,36 +2,278 @@
 # -*- coding: utf-8 -*-
 """
 Homelab readiness audit for WSL2 + k3s + Traefik + Vault/ESO + Ory + Supabase + RabbitMQ + LGTM + etc.
-Outputs JSON and/or Markdown with PASS/WARN/FAIL + fix hints.
+Outputs JSON and/or Markdown with PASS/WARN/FAIL/TIMEOUT + fix hints.
+Checks live in a registry (select with --only/--skip/--fast); extra sections are
+plugin modules under checks/, imported only when selected.
 
 No third-party deps. Python 3.8+.
 """
-import argparse, json, platform, re, shutil, subprocess, sys
+import argparse, asyncio, fnmatch, functools, importlib, ipaddress, json, os, platform, re, shutil, signal, socket, subprocess, sys, threading, time, traceback
+from collections import deque
+from concurrent.futures import CancelledError, Future, ThreadPoolExecutor, as_completed
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Tuple, Dict, Optional, Mapping
+from typing import List, Tuple, Dict, Optional, Mapping, Callable, Set, TextIO, Any
+
+# -------- concurrency --------
+# Every subprocess probe runs on one background asyncio loop (ProbeLoop); callers stay
+# synchronous and block on the probe's future. _DEADLINE is the absolute
+# (time.monotonic) end of the whole audit. Both are configured once by main(); with no
+# loop configured, run() starts a serial one on first use, and no deadline means
+# only per-probe timeouts apply.
+_PROBES: Optional["ProbeLoop"] = None
+_PROBES_LOCK = threading.Lock()
+_DEADLINE: Optional[float] = None
+
+# Return code for probes that timed out or hit the deadline (same as timeout(1)).
+RC_TIMEOUT = 124
+# Captured output beyond this many bytes is drained and dropped (limit=None keeps it all,
+# for probes whose output is parsed rather than shown).
+OUTPUT_LIMIT = 8 << 20
+# After the command exits, how long to keep reading output still being written by
+# children it left behind (they are killed with the rest of the group afterwards).
+PIPE_GRACE = 0.5
+
+def remaining() -> Optional[float]:
+    """Seconds left before the global deadline (None when no deadline is set)."""
+    if _DEADLINE is None:
+        return None
+    return max(0.0, _DEADLINE - time.monotonic())
+
+def _killpg(proc:asyncio.subprocess.Process) -> None:
+    # probes start in their own session, so this also reaches grandchildren
+    # (e.g. what `rdctl shell` spawns) that would otherwise keep the pipe open
+    try:
+        if hasattr(os, "killpg"):
+            os.killpg(proc.pid, signal.SIGKILL)
+        else:
+            proc.kill()
+    except (ProcessLookupError, PermissionError):
+        pass
+
+class ProbeLoop:
+    """Background asyncio event loop that runs subprocess probes, at most `jobs` at once.
+
+    Each probe gets its own process group, which is killed on timeout or cancellation;
+    close() cancels whatever is still queued or running.
+    """
+    def __init__(self, jobs:int=1):
+        self.jobs = max(1, jobs)
+        self.loop = asyncio.new_event_loop()
+        self.pending: Set[Future] = set()
+        self.lock = threading.Lock()
+        ready = threading.Event()
+        self.thread = threading.Thread(target=self._serve, args=(ready,), name="probe-loop", daemon=True)
+        self.thread.start()
+        ready.wait()
+
+    def _serve(self, ready:threading.Event) -> None:
+        asyncio.set_event_loop(self.loop)
+        self.sem = asyncio.Semaphore(self.jobs)
+        ready.set()
+        self.loop.run_forever()
+
+    def submit(self, cmd:List[str], timeout:float, capture:bool=True, limit:Optional[int]=OUTPUT_LIMIT,
+               stderr:bool=True) -> Future:
+        fut = asyncio.run_coroutine_threadsafe(self._probe(cmd, timeout, capture, limit, stderr), self.loop)
+        with self.lock:
+            self.pending.add(fut)
+        fut.add_done_callback(self._forget)
+        return fut
+
+    def _forget(self, fut:Future) -> None:
+        with self.lock:
+            self.pending.discard(fut)
+
+    async def _probe(self, cmd:List[str], timeout:float, capture:bool, limit:Optional[int],
+                     stderr:bool=True) -> tuple[int,str]:
+        async with self.sem:
+            left = remaining()
+            if left is not None:
+                if left <= 0:
+                    return RC_TIMEOUT, "deadline exceeded"
+                timeout = min(timeout, left)
+            started, wall = time.monotonic(), time.time_ns()
+            buf, err, dropped = bytearray(), bytearray(), 0
+            proc: Optional[asyncio.subprocess.Process] = None
+            rc: Optional[int] = None
+            timed_out = False
+
+            async def communicate() -> int:
+                nonlocal proc, dropped
+                pipe = asyncio.subprocess.PIPE if capture else None
+                proc = await asyncio.create_subprocess_exec(*cmd, stdin=asyncio.subprocess.DEVNULL, stdout=pipe,
+                                                            stderr=(asyncio.subprocess.STDOUT if stderr else pipe) if capture else None,
+                                                            start_new_session=True)
+                async def drain(stream:asyncio.StreamReader, sink:bytearray, cap:Optional[int]) -> None:
+                    nonlocal dropped
+                    while True:
+                        chunk = await stream.read(1 << 16)
+                        if not chunk:
+                            return
+                        keep = chunk if cap is None else chunk[:max(0, cap - len(sink))]
+                        sink.extend(keep)
+                        if sink is buf:
+                            dropped += len(chunk) - len(keep)
+                if not capture:
+                    return await proc.wait()
+                readers = [asyncio.ensure_future(drain(proc.stdout, buf, limit))]
+                if not stderr:
+                    readers.append(asyncio.ensure_future(drain(proc.stderr, err, OUTPUT_LIMIT)))
+                try:
+                    # proc.wait() also waits for the pipe to close, which a grandchild can
+                    # hold open indefinitely; the exit status is what counts
+                    while proc.returncode is None and not all(r.done() for r in readers):
+                        await asyncio.wait(readers, timeout=0.05)
+                    if proc.returncode is None:
+                        return await proc.wait()
+                    await asyncio.wait(readers, timeout=PIPE_GRACE)
+                    return proc.returncode
+                finally:
+                    for r in readers:
+                        r.cancel()
+
+            try:
+                rc = await asyncio.wait_for(communicate(), timeout)
+                out = buf.decode(errors="replace").strip()
+                if dropped:
+                    out += f"\n[output truncated: {dropped} bytes dropped]"
+                if rc != 0:
+                    out = err.decode(errors="replace").strip() or out
+                return rc, out if rc==0 else (out or f"{cmd[0]} exited with status {rc}")
+            except asyncio.TimeoutError:
+                timed_out = True
+                left = remaining()
+                return RC_TIMEOUT, "deadline exceeded" if left is not None and left <= 0 else f"timed out after {timeout:g}s"
+            except OSError as e:
+                return 1, str(e)
+            finally:
+                if proc is not None:
+                    # whether it finished, timed out or was cancelled, nothing it started outlives the probe
+                    _killpg(proc)
+                    if proc.returncode is None:
+                        await proc.wait()
+                elapsed = time.monotonic() - started
+                METRICS.observe(cmd, elapsed)
+                PROFILE.record(cmd, wall, elapsed, rc, timed_out, len(buf))
+
+    def close(self) -> None:
+        """Cancel queued and running probes (killing their process groups), then stop."""
+        with self.lock:
+            pending = list(self.pending)
+        for fut in pending:
+            fut.cancel()
+        # give the cancelled probes a moment to reap their killed processes
+        deadline = time.monotonic() + 2
+        while self.pending and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout=2)
+
+def probe_loop() -> ProbeLoop:
+    """The shared probe loop (a serial one is started if main() did not configure it)."""
+    global _PROBES
+    with _PROBES_LOCK:
+        if _PROBES is None:
+            _PROBES = ProbeLoop()
+        return _PROBES
+
+def run_all(probes: Mapping[str, Tuple[List[str], float]], dry_run:bool=False) -> Dict[str, tuple[int,str]]:
+    """Run independent probes concurrently on the shared loop.
+
+    `probes` maps a key to (cmd, timeout); results come back keyed the same way so callers
+    can assemble rows in their usual order regardless of completion order.
+    """
+    if dry_run:
+        return {k: run(cmd, timeout=t, dry_run=True) for k,(cmd,t) in probes.items()}
+    loop = probe_loop()
+    futures = {k: loop.submit(cmd, t) for k,(cmd,t) in probes.items()}
+    return {k: _result(fut) for k, fut in futures.items()}
+
+def _result(fut:Future) -> tuple[int,str]:
+    try:
+        return fut.result()
+    except CancelledError:
+        return RC_TIMEOUT, "cancelled"
 
 # -------- utility --------
-def run(cmd:List[str], timeout:float=10, check:bool=False, capture:bool=True, dry_run:bool=False) -> tuple[int,str]:
+def run(cmd:List[str], timeout:float=10, capture:bool=True, dry_run:bool=False,
+        limit:Optional[int]=OUTPUT_LIMIT, stderr:bool=True) -> tuple[int,str]:
     """Run a command returning (rc, output).
 
     When dry_run=True, we don't execute anything and instead return a sentinel.
+    The timeout is clamped to whatever is left of the global deadline; a timed-out
+    probe returns RC_TIMEOUT. A non-zero exit returns its own code and output.
+    stderr=False keeps stderr out of the output of a successful run (for output that is
+    parsed, where warnings would corrupt it); on failure stderr is the output.
     """
     if dry_run:
         return 0, "(dry-run skipped)"
-    try:
-        if capture:
-            out = subprocess.check_output(cmd, stderr=subprocess.STDOUT, timeout=timeout, text=True)
-            return 0, out.strip()
-        else:
-            p = subprocess.run(cmd, timeout=timeout, check=check)
-            return p.returncode, ""
-    except Exception as e:
-        return 1, str(e)
+    return _result(probe_loop().submit(cmd, timeout, capture, limit, stderr))
 
 def which(x:str)->str|None:
     return shutil.which(x)
 
+# -------- probe cache --------
+class ProbeCache:
+    """On-disk cache of CLI version probe results.
+
+    Entries are keyed by the probe argv plus the resolved binary's path, inode, size and
+    mtime, so replacing or upgrading a binary invalidates its entry automatically. Entries
+    older than `ttl` seconds are ignored; beyond `max_entries` the least recently used
+    entries are evicted on save. Only successful probes are cached. Safe to share between
+    the threads of one run.
+    """
+    def __init__(self, path:Path, ttl:float=86400, max_entries:int=256):
+        self.path, self.ttl, self.max_entries = path, ttl, max_entries
+        self.dirty = False
+        self.lock = threading.Lock()
+        try:
+            self.entries: Dict[str, dict] = json.loads(path.read_text())
+        except (OSError, ValueError):
+            self.entries = {}
+
+    @staticmethod
+    def key(cmd:List[str]) -> Optional[str]:
+        exe = which(cmd[0])
+        if not exe:
+            return None
+        real = os.path.realpath(exe)
+        try:
+            st = os.stat(real)
+        except OSError:
+            return None
+        return json.dumps([cmd, real, st.st_ino, st.st_size, st.st_mtime_ns])
+
+    def get(self, cmd:List[str]) -> Optional[tuple[int,str]]:
+        k = self.key(cmd)
+        with self.lock:
+            e = self.entries.get(k) if k else None
+            if not e or time.time() - e["stored"] > self.ttl:
+                return None
+            e["used"] = time.time(); self.dirty = True
+            return e["rc"], e["out"]
+
+    def put(self, cmd:List[str], result:tuple[int,str]) -> None:
+        k = self.key(cmd)
+        if k and result[0]==0:
+            now = time.time()
+            with self.lock:
+                self.entries[k] = {"rc":result[0], "out":result[1], "stored":now, "used":now}
+                self.dirty = True
+
+    def save(self) -> None:
+        with self.lock:
+            if not self.dirty:
+                return
+            keep = sorted(self.entries.items(), key=lambda kv: kv[1]["used"], reverse=True)[:self.max_entries]
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(dict(keep)))
+            tmp.replace(self.path)
+            self.dirty = False
+
 def listen_ports(dry_run:bool=False):
     # Try psutil-free approach: ss -> netstat -> lsof
     for probe in [
@@ -42,6 +284,64 @@ def listen_ports(dry_run:bool=False):
             if rc==0: return out
     return ""
 
+PROC_NET_TCP = ("/proc/net/tcp", "/proc/net/tcp6")
+TCP_LISTEN = "0A"
+
+def _proc_addr(hexaddr:str) -> str:
+    # /proc/net/tcp* stores addresses as 32-bit words in host byte order
+    if len(hexaddr) == 8:
+        return socket.inet_ntop(socket.AF_INET, int(hexaddr, 16).to_bytes(4, sys.byteorder))
+    raw = b"".join(int(hexaddr[i:i+8], 16).to_bytes(4, sys.byteorder) for i in range(0, 32, 8))
+    return socket.inet_ntop(socket.AF_INET6, raw)
+
+def proc_listeners(paths:Optional[Tuple[str,...]]=None) -> Optional[Set[Tuple[str,int]]]:
+    """Listening TCP sockets as {(addr, port)} parsed straight from procfs.
+
+    Returns None when procfs is unavailable (non-Linux), so callers can fall back to
+    shelling out to ss/netstat/lsof. `paths` defaults to PROC_NET_TCP.
+    """
+    found: Set[Tuple[str,int]] = set()
+    readable = False
+    for path in PROC_NET_TCP if paths is None else paths:
+        try:
+            with open(path) as f:
+                next(f, None)  # header
+                readable = True
+                for line in f:
+                    parts = line.split(None, 4)
+                    if len(parts) < 4 or parts[3] != TCP_LISTEN:
+                        continue
+                    addr, _, port = parts[1].partition(":")
+                    found.add((_proc_addr(addr), int(port, 16)))
+        except OSError:
+            continue
+    return found if readable else None
+
+def listeners(dry_run:bool=False) -> Optional[Set[Tuple[str,int]]]:
+    """Listening sockets from procfs, else one pass over ss/netstat/lsof output.
+
+    Tool output carries no reliable address column across platforms, so fallback
+    entries use "?" as the address.
+    """
+    found = proc_listeners()
+    if found is not None:
+        return found
+    out = listen_ports(dry_run=dry_run)
+    if not out:
+        return None
+    return {("?", int(p)) for p in re.findall(r":(\d{1,5})\b", out)}
+
+def bind_scope(addrs:Set[str]) -> str:
+    """Describe where a port is bound: all interfaces, loopback only, or specific addresses."""
+    if "?" in addrs:
+        return "scope unknown"
+    ips = {ipaddress.ip_address(a) for a in addrs}
+    if any(ip.is_unspecified for ip in ips):
+        return "all interfaces"
+    if all(ip.is_loopback or (ip.version==6 and ip.ipv4_mapped and ip.ipv4_mapped.is_loopback) for ip in ips):
+        return "loopback only"
+    return ", ".join(sorted(addrs))
+
 def is_wsl():
     try:
         with open("/proc/version","r") as f:
@@ -49,15 +349,32 @@ def is_wsl():
     except:
         return False
 
-def kget(args:list[str], dry_run:bool=False):
-    return run(["kubectl"]+args, timeout=15, dry_run=dry_run)
-
 def parse_args():
     ap = argparse.ArgumentParser()
-    ap.add_argument("--out", default="tools/audit/reports", help="output directory")
-    ap.add_argument("--format", choices=["json","md","both"], default="both")
-    ap.add_argument("--strict", action="store_true", help="exit nonzero if any FAIL")
+    ap.add_argument("--out", default="tools/audit/reports", help="output directory ('-' prints the JSON report to stdout)")
+    ap.add_argument("--format", choices=["json","md","both","ndjson"], default="both",
+                    help="md still writes readiness.json as the baseline for deltas; ndjson streams one line per "
+                         "check as results arrive (readiness.ndjson, or stdout with --out -)")
+    ap.add_argument("--strict", action="store_true", help="exit nonzero if any FAIL or TIMEOUT")
     ap.add_argument("--dry-run", action="store_true", help="simulate checks without executing external commands")
+    ap.add_argument("--jobs", type=int, default=16, help="max concurrent probes (1 = serial)")
+    ap.add_argument("--deadline", type=float, default=90.0, help="overall time budget in seconds (0 = none)")
+    ap.add_argument("--watch", action="store_true", help="keep running; re-check sections on their own intervals and rewrite reports only when a level changes")
+    ap.add_argument("--metrics", metavar="[HOST]:PORT", help="serve Prometheus metrics on /metrics (implies --watch)")
+    ap.add_argument("--profile", action="store_true", help="record per-probe timings into the reports")
+    ap.add_argument("--trace-file", help="with --profile, also write probe spans as OTLP/JSON to this file")
+    ap.add_argument("--deploy-dir", help="GitOps manifests / Helm values to index (default: deploy/ at the repo root)")
+    ap.add_argument("--changed-only", action="store_true", help="Markdown lists only checks that changed since the previous readiness.json")
+    ap.add_argument("--history", type=int, default=500, help="max delta records kept in readiness.history.ndjson (0 = no history)")
+    ap.add_argument("--no-cache", action="store_true", help="always re-run CLI version probes")
+    ap.add_argument("--cache-ttl", type=float, default=86400, help="seconds a cached CLI probe result stays valid")
+    ap.add_argument("--store", metavar="PATH", help="history store to append every run to (default: <out>/readiness.db; query with audit_history.py)")
+    ap.add_argument("--no-store", action="store_true", help="do not record runs in the history store")
+    ap.add_argument("--only", action="append", metavar="PATTERN",
+                    help="run only matching checks (glob on section slug, 'section/check' or check name, e.g. kubernetes, 'kubernetes/argocd'; repeatable, comma-separated)")
+    ap.add_argument("--skip", action="append", metavar="PATTERN", help="skip matching checks (same patterns as --only)")
+    ap.add_argument("--fast", action="store_true", help="cheap checks only (no cluster or CLI probes)")
+    ap.add_argument("--list-checks", action="store_true", help="print the selected checks with their cost and requirements, then exit")
     return ap.parse_args()
 
 # -------- checks --------
@@ -123,9 +440,11 @@ KNOWN_PORTS = {
     5678: "n8n",
 }
 
-def status(pass_: Optional[bool]=None, warn:bool=False, msg:str="", fix:str="", skip:bool=False) -> Dict[str,str]:
+def status(pass_: Optional[bool]=None, warn:bool=False, msg:str="", fix:str="", skip:bool=False, timeout:bool=False) -> Dict[str,str]:
     if skip:
         level="SKIP"
+    elif timeout:
+        level="TIMEOUT"
     elif pass_ is None and warn:
         level="WARN"
     elif pass_:
@@ -143,7 +462,7 @@ def check_os_env() -> List[Tuple[str, Dict[str,str]]]:
         if rc==0 and "running" in out:
             items.append(("systemd", status(True, msg="systemd active")))
         else:
-            items.append(("systemd", status(None, warn=True, msg=f"systemd not fully running ({out})", fix="Enable systemd in /etc/wsl.conf and restart WSL")))
+            items.append(("systemd", status(None, warn=True, msg=f"systemd not fully running ({out})", fix="Enable systemd in /etc/wsl.conf and restart WSL", timeout=rc==RC_TIMEOUT)))
     else:
         items.append(("systemd", status(None, warn=True, msg="systemctl not found", fix="Enable systemd in WSL or proceed without it")))
     # virtualization flags
@@ -160,205 +479,993 @@ def check_os_env() -> List[Tuple[str, Dict[str,str]]]:
     items.append(("k3s-install", status(bool(present), msg=f"found {len(present)}/{len(k3s_dirs)} dirs" if present else "k3s dirs missing", fix="Install k3s via rancher installer or verify permissions")))
     return items
 
-def check_cmds(dry_run:bool=False) -> List[Tuple[str, Dict[str,str]]]:
-    rows: List[Tuple[str, Dict[str,str]]] = []
-    for name, cmd in KNOWN_CMDS.items():
-        if which(cmd[0]):
-            if dry_run:
-                rows.append((name, status(skip=True, msg="(dry-run skipped)")))
-            else:
-                rc,out = run(cmd, dry_run=dry_run)
-                ok = (rc==0)
-                msg = out.splitlines()[0] if out else "ok"
-                rows.append((name, status(ok, msg=msg)))
-        else:
-            rows.append((name, status(False, msg="not installed", fix=f"Install {name} and ensure it is on PATH")))
-    return rows
-
-def check_k8s(dry_run:bool=False) -> List[Tuple[str, Dict[str,str]]]:
-    rows: List[Tuple[str, Dict[str,str]]] = []
-    if not which("kubectl"):
-        rows.append(("kubectl", status(False, msg="kubectl not installed")))
-        return rows
-    if dry_run:
-        rows.append(("cluster", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,out = kget(["cluster-info"], dry_run=dry_run)
-        rows.append(("cluster", status(rc==0, msg=out if rc!=0 else "cluster reachable", fix="Ensure kubeconfig / KUBECONFIG and k3s/rancher are running")))
-        # k3s server version via node query (fallback to binary handled in CLI section)
-        rc,nodes = kget(["get","nodes","-o","wide"], dry_run=dry_run)
-        if rc==0 and nodes:
-            first_line = nodes.splitlines()[1] if len(nodes.splitlines())>1 else nodes.splitlines()[0]
-            rows.append(("node-sample", status(True, msg=first_line)))
-    # CNI detection (cilium/calico/flannel)
-    if dry_run:
-        rows.append(("cni", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc, pods = kget(["-n","kube-system","get","pods","-o","name"], dry_run=dry_run)
-        cni = "unknown"
-        if rc==0:
-            if "cilium" in pods: cni="cilium"
-            elif "calico" in pods: cni="calico"
-            elif "flannel" in pods: cni="flannel"
-        rows.append(("cni", status(True, msg=f"{cni}")))
-        if cni=="flannel":
-            rows.append(("networkpolicy", status(None, warn=True, msg="Flannel does not enforce NetworkPolicies", fix="Switch to Cilium or Calico for policy support")))
-    # Traefik
-    if dry_run:
-        rows.append(("traefik", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc, tsvc = kget(["-n","kube-system","get","svc","-o","wide"], dry_run=dry_run)
-        rows.append(("traefik", status(rc==0 and "traefik" in tsvc, msg="Traefik service detected" if rc==0 else "svc list failed")))
-    # MetalLB
-    if dry_run:
-        rows.append(("metallb", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,_ = kget(["get","ns","metallb-system"], dry_run=dry_run)
-        rows.append(("metallb", status(rc==0, msg="metallb-system namespace present" if rc==0 else "not installed", fix="Install MetalLB and configure IPAddressPool + L2Advertisement")))
-    # ArgoCD
-    if dry_run:
-        rows.append(("argocd", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,_ = kget(["get","ns","argocd"], dry_run=dry_run)
-        rows.append(("argocd", status(rc==0, msg="argocd namespace present" if rc==0 else "not installed", fix="Install Argo CD (GitOps)")))
-    # External Secrets Operator
-    if dry_run:
-        rows.append(("external-secrets", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,_ = kget(["get","crd"], dry_run=dry_run)
-        eso_present = (rc==0 and "externalsecrets.external-secrets.io" in _ or "clustersecretstores.external-secrets.io" in _)
-        rows.append(("external-secrets", status(eso_present, msg="ESO CRDs found" if eso_present else "ESO not detected", fix="Install External Secrets Operator and configure Vault ClusterSecretStore")))
-    # Vault
-    if dry_run:
-        rows.append(("vault", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,_ = kget(["get","ns","vault"], dry_run=dry_run)
-        rows.append(("vault", status(rc==0, msg="vault namespace present" if rc==0 else "not installed", fix="Deploy Vault with Raft + TLS; enable k8s auth")))
-    # Ory
-    if dry_run:
-        rows.append(("ory", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,_ = kget(["get","ns","ory"], dry_run=dry_run)
-        rows.append(("ory", status(rc==0, msg="ory namespace present" if rc==0 else "not installed", fix="Deploy Kratos + Hydra and consent UI")))
-    # Supabase (namespace or label)
-    if dry_run:
-        rows.append(("supabase", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,out = kget(["get","ns"], dry_run=dry_run)
-        supa = rc==0 and ("supabase" in out.lower() or "data" in out.lower())
-        rows.append(("supabase", status(supa, msg="namespace present" if supa else "not detected", fix="Deploy Supabase; expose only Kong (8000/8443)")))
-    # RabbitMQ
-    if dry_run:
-        rows.append(("rabbitmq", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,_ = kget(["get","ns","rabbitmq"], dry_run=dry_run)
-        rows.append(("rabbitmq", status(rc==0, msg="rabbitmq namespace present" if rc==0 else "not installed", fix="Deploy RabbitMQ; mgmt internal; metrics 15692")))
-    # LGTM / Grafana
-    if dry_run:
-        rows.append(("observability", status(skip=True, msg="(dry-run skipped)")))
-        rows.append(("rancher", status(skip=True, msg="(dry-run skipped)")))
-    else:
-        rc,out = kget(["get","ns"], dry_run=dry_run)
-        lgtm = rc==0 and ("lgtm" in out.lower() or "observability" in out.lower() or "grafana" in out.lower())
-        rows.append(("observability", status(lgtm, msg="observability ns present" if lgtm else "not detected", fix="Deploy docker-otel-lgtm (Grafana/Tempo/Loki/Mimir)")))
-        rc,out = kget(["get","ns"], dry_run=dry_run)
-        rancher = rc==0 and ("cattle-system" in out.lower() or "rancher" in out.lower())
-        # If k3s present but rancher absent -> WARN; else FAIL
-        if rancher:
-            rows.append(("rancher", status(True, msg="rancher/cattle-system ns present")))
-            # Try get rancher deployment image version
-            rc, dep = kget(["-n","cattle-system","get","deploy","rancher","-o","jsonpath={.spec.template.spec.containers[0].image}"], dry_run=dry_run)
-            if rc==0 and dep:
-                rows.append(("rancher-version", status(True, msg=dep)))
-        else:
-            # detect k3s by k3s binary / dirs
-            k3s_present = bool(which("k3s")) or Path("/var/lib/rancher/k3s").exists()
-            if k3s_present:
-                rows.append(("rancher", status(None, warn=True, msg="k3s present, Rancher not detected", fix="Install Rancher for multi-cluster management or ignore if single cluster")))
-            else:
-                rows.append(("rancher", status(False, msg="not detected", fix="Deploy Rancher (cattle-system) if centralized mgmt desired")))
-        # Rancher Desktop specific (rdctl) details
-        if which("rdctl"):
-            if dry_run:
-                rows.append(("rdctl", status(skip=True, msg="(dry-run skipped)")))
-            else:
-                rc,out = run(["rdctl","version"], dry_run=dry_run)
-                rows.append(("rdctl", status(rc==0, msg=out.splitlines()[0] if out else "installed")))
-                # Try to fetch embedded k8s node sample via rdctl shell kubectl
-                rc, rd_nodes = run(["rdctl","shell","kubectl","get","nodes","-o","wide"], dry_run=dry_run)
-                if rc==0 and rd_nodes:
-                    lines = rd_nodes.splitlines()
-                    if len(lines) > 1:
-                        rows.append(("rdctl-node", status(True, msg=lines[1])))
-    return rows
-
 def check_ports(dry_run:bool=False) -> List[Tuple[str, Dict[str,str]]]:
     if dry_run:
         # Mark all port checks as skipped
         return [(f"port:{p}", status(skip=True, msg="(dry-run skipped)")) for p in sorted(KNOWN_PORTS.keys())]
-    out = listen_ports(dry_run=dry_run)
+    socks = listeners(dry_run=dry_run)
     rows: List[Tuple[str, Dict[str,str]]] = []
-    if not out:
+    if socks is None:
         rows.append(("ports", status(None, warn=True, msg="Could not list listening ports", fix="Install ss or netstat or lsof")))
         return rows
+    by_port: Dict[int, Set[str]] = {}
+    for addr, port in socks:
+        by_port.setdefault(port, set()).add(addr)
     for p, desc in sorted(KNOWN_PORTS.items()):
-        if re.search(rf":{p}\b", out):
-            rows.append((f"port:{p}", status(None, warn=True, msg=f"Listening on host: {desc}", fix="If this should be cluster-only, remove host binds and expose via Traefik")))
+        if p in by_port:
+            rows.append((f"port:{p}", status(None, warn=True, msg=f"Listening on host ({bind_scope(by_port[p])}): {desc}", fix="If this should be cluster-only, remove host binds and expose via Traefik")))
         else:
             rows.append((f"port:{p}", status(True, msg="no host bind detected")))
     return rows
 
+# -------- check registry --------
+# Every check is registered under a section with the requirements it needs and a cost
+# class. Requirements are "bin:<exe>" (omit the check when the binary is missing),
+# "ns:<namespace>" (omit when the namespace does not exist) and "check:<name>" (an
+# earlier check of the same section must not FAIL; dependents are reported as SKIP
+# instead of timing out one by one). Plugin modules in checks/ register the same way.
+COSTS = ("cheap", "normal", "slow")
+
+class Check:
+    def __init__(self, section:str, name:str, fn:Callable[["Context"], List[Tuple[str, Dict[str,str]]]],
+                 requires:Tuple[str,...]=(), cost:str="normal", dry_ok:bool=False):
+        if cost not in COSTS:
+            raise ValueError(f"{section}/{name}: unknown cost class {cost!r}")
+        self.section, self.name, self.fn = section, name, fn
+        self.requires, self.cost, self.dry_ok = tuple(requires), cost, dry_ok
+        self.after = [r.split(":", 1)[1] for r in self.requires if r.startswith("check:")]
+
+REGISTRY: Dict[str, List[Check]] = {}
+
+def check(section:str, name:str, requires:Tuple[str,...]=(), cost:str="normal", dry_ok:bool=False):
+    """Decorator registering `fn(ctx) -> rows` as a check; rows keep registration order.
+
+    dry_ok=True means the check only reads local state (or handles dry-run itself);
+    otherwise --dry-run reports it as SKIP without calling it.
+    """
+    def deco(fn):
+        REGISTRY.setdefault(section, []).append(Check(section, name, fn, requires, cost, dry_ok))
+        return fn
+    return deco
+
+class Context:
+    """Per-run state shared by the checks of one section (fresh for every run)."""
+    def __init__(self, dry_run:bool=False, cache:Optional[ProbeCache]=None, args:Any=None, outdir:Optional[Path]=None):
+        self.dry_run, self.cache, self.args, self.outdir = dry_run, cache, args, outdir
+        self._k8s: Optional["K8sInventory"] = None
+        self._lock = threading.Lock()
+
+    @property
+    def k8s(self) -> "K8sInventory":
+        with self._lock:
+            if self._k8s is None:
+                # parsed as one JSON document, so a capped (cut-off) snapshot would only fail to load
+                # (and kubectl prints discovery warnings to stderr even when it succeeds)
+                self._k8s = K8sInventory(run(SNAPSHOT_CMD, timeout=15, limit=None, stderr=False))
+            return self._k8s
+
+def section_slug(section:str) -> str:
+    return re.sub(r"[^a-z0-9]+", "-", section.lower()).strip("-")
+
+def _selected(c:Check, patterns:List[str]) -> bool:
+    slug = section_slug(c.section)
+    return any(fnmatch.fnmatchcase(k, p.lower()) for p in patterns for k in (slug, f"{slug}/{c.name}", c.name))
+
+def select_checks(only:List[str], skip:List[str], fast:bool) -> Dict[str, List[Check]]:
+    """Filter REGISTRY by --only/--skip patterns and --fast, keeping the checks that
+    selected ones depend on."""
+    out: Dict[str, List[Check]] = {}
+    for section, checks in REGISTRY.items():
+        keep = {c.name for c in checks
+                if (not only or _selected(c, only)) and not _selected(c, skip) and (not fast or c.cost == "cheap")}
+        by_name = {c.name: c for c in checks}
+        todo = list(keep)
+        while todo:
+            for dep in by_name[todo.pop()].after:
+                if dep in by_name and dep not in keep:
+                    keep.add(dep); todo.append(dep)
+        if keep:
+            out[section] = [c for c in checks if c.name in keep]
+    return out
+
+def _evaluate(c:Check, ctx:Context, levels:Mapping[str, Optional[str]]) -> Optional[List[Tuple[str, Dict[str,str]]]]:
+    """Rows for one check, or None when a requirement says it does not apply here.
+
+    A check that raises becomes a FAIL row of its own (traceback on stderr), so one buggy
+    check cannot abort the report or stop --watch.
+    """
+    for req in c.requires:
+        kind, _, arg = req.partition(":")
+        if kind == "bin" and not which(arg):
+            return None
+        if kind == "check":
+            if levels.get(arg) is None:
+                return None
+            if not ctx.dry_run and levels[arg] in ("FAIL", "TIMEOUT", "SKIP"):
+                verb = {"FAIL": "failed", "TIMEOUT": "timed out"}.get(levels[arg], "was skipped")
+                return [(c.name, status(skip=True, msg=f"skipped: {arg} check {verb}"))]
+        if kind == "ns" and not ctx.dry_run and not ctx.k8s.has_ns(arg):
+            return None
+    if ctx.dry_run and not c.dry_ok:
+        return [(c.name, status(skip=True, msg="(dry-run skipped)"))]
+    try:
+        return c.fn(ctx)
+    except Exception as e:
+        print(f"[check] {section_slug(c.section)}/{c.name} raised:\n{traceback.format_exc()}", file=sys.stderr, end="")
+        return [(c.name, status(False, msg=f"check crashed: {type(e).__name__}: {e}",
+                                fix=f"Bug in the check; rerun with --only {section_slug(c.section)}/{c.name} for the traceback"))]
+
+def run_section(checks:List[Check], ctx:Context,
+                emit:Optional[Callable[[str, List[Tuple[str, Dict[str,str]]]], None]]=None,
+                owners:Optional[Dict[str, List[str]]]=None) -> List[Tuple[str, Dict[str,str]]]:
+    """Run one section's checks in dependency waves; independent checks of a wave run
+    side by side when probes are concurrent (--jobs > 1).
+
+    `emit(section, rows)` is called from the worker thread as soon as each check is done
+    (in completion order); the returned rows are in registration order. `owners`, when
+    given, is filled with {check name: names of the rows it produced}.
+    """
+    results: Dict[str, Optional[List[Tuple[str, Dict[str,str]]]]] = {}
+    levels: Dict[str, Optional[str]] = {}
+
+    def done(c:Check, rows:Optional[List[Tuple[str, Dict[str,str]]]]) -> None:
+        results[c.name] = rows
+        if owners is not None:
+            owners[c.name] = [name for name, _ in rows or []]
+        if rows is None:
+            levels[c.name] = None
+            return
+        own = [st["level"] for name, st in rows if name == c.name]
+        levels[c.name] = (own or [st["level"] for _, st in rows] or ["PASS"])[0]
+        if emit is not None:
+            emit(c.section, rows)
+
+    pending = list(checks)
+    while pending:
+        wave = [c for c in pending if all(d in results or d not in {x.name for x in checks} for d in c.after)]
+        if not wave:  # dependency cycle: run the rest unordered rather than hang
+            wave = pending
+        if _PROBES is not None and _PROBES.jobs > 1 and len(wave) > 1:
+            with ThreadPoolExecutor(max_workers=len(wave), thread_name_prefix="check") as ex:
+                futures = {ex.submit(_evaluate, c, ctx, levels): c for c in wave}
+                for fut in as_completed(futures):
+                    done(futures[fut], fut.result())
+        else:
+            for c in wave:
+                done(c, _evaluate(c, ctx, levels))
+        pending = [c for c in pending if c not in wave]
+    return [row for c in checks for row in results.get(c.name) or []]
+
+def load_plugins(only:List[str], skip:List[str], plugin_dir:Optional[Path]=None) -> List[str]:
+    """Import checks/<section_slug>.py plugins that the selectors can reach.
+
+    A plugin registers its checks with `@check(...)` at import time, so only the file
+    names are looked at up front. Missing directory (e.g. script streamed over stdin by
+    fleet_audit.py) means no plugins.
+    """
+    if plugin_dir is None:
+        main_file = globals().get("__file__", "")
+        if not main_file.endswith(".py"):
+            return []
+        plugin_dir = Path(main_file).resolve().parent/"checks"
+    if not (plugin_dir/"__init__.py").is_file():
+        return []
+    # plugins `from audit_readiness import ...`; make that resolve to this module even
+    # when it runs as __main__, so they register into the live REGISTRY
+    sys.modules.setdefault("audit_readiness", sys.modules[__name__])
+    if str(plugin_dir.parent) not in sys.path:
+        sys.path.insert(0, str(plugin_dir.parent))
+    known = {section_slug(s) for s in REGISTRY}
+    loaded: List[str] = []
+    for path in sorted(plugin_dir.glob("[!_]*.py")):
+        slug = path.stem.replace("_", "-")
+        if any(fnmatch.fnmatchcase(slug, p.lower()) for p in skip):
+            continue
+        if only and not any(fnmatch.fnmatchcase(slug, p.lower().split("/", 1)[0]) or
+                            ("/" not in p and not any(fnmatch.fnmatchcase(k, p.lower()) for k in known))
+                            for p in only):
+            continue
+        importlib.import_module(f"{plugin_dir.name}.{path.stem}")
+        loaded.append(path.stem)
+    return loaded
+
+# -------- built-in checks --------
+@check("OS & Platform", "os", cost="cheap", dry_ok=True)  # local file reads ok in dry-run
+def os_env(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    return check_os_env()
+
+def cmd_check(name:str, cmd:List[str]) -> None:
+    """Register a CLI Tooling check for one KNOWN_CMDS entry, so each version probe is
+    reported as soon as it returns instead of waiting for the slowest one."""
+    @check("CLI Tooling", name, cost="slow", dry_ok=True)
+    def fn(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+        if not which(cmd[0]):
+            return [(name, status(False, msg="not installed", fix=f"Install {name} and ensure it is on PATH"))]
+        if ctx.dry_run:
+            return [(name, status(skip=True, msg="(dry-run skipped)"))]
+        res = ctx.cache.get(cmd) if ctx.cache is not None else None
+        if res is None:
+            res = run(cmd, timeout=10)
+            if ctx.cache is not None:
+                ctx.cache.put(cmd, res)
+        rc, out = res
+        return [(name, status(rc==0, msg=out.splitlines()[0] if out else "ok", timeout=rc==RC_TIMEOUT))]
+
+for _name, _cmd in KNOWN_CMDS.items():
+    cmd_check(_name, _cmd)
+
+# -------- kubernetes inventory --------
+# One snapshot of the cluster per audit: every Kubernetes check reads from it instead of
+# spawning its own kubectl, so the section costs a fixed number of API calls.
+SNAPSHOT_CMD = ["kubectl","-n","kube-system","get","namespaces,nodes,pods,services","-o","json"]
+# CRDs rather than `api-resources`, which exits 1 as soon as one aggregated API is down
+CRDS_CMD = ["kubectl","get","crd","-o","name"]
+RANCHER_IMAGE_CMD = ["kubectl","-n","cattle-system","get","deploy","rancher","-o","jsonpath={.spec.template.spec.containers[0].image}"]
+
+class K8sInventory:
+    """In-memory view of the cluster built from a handful of kubectl calls.
+
+    `ok` is False when the main snapshot failed; `error` then carries kubectl's output.
+    Pods and services are limited to kube-system; namespaces and nodes are cluster-wide.
+    CRD names and the Rancher image are fetched on first use only.
+    """
+    def __init__(self, snapshot:Tuple[int,str]):
+        rc, out = snapshot
+        self.ok = rc==0
+        self.timed_out = rc==RC_TIMEOUT
+        self.error = "" if self.ok else out
+        self.namespaces: List[str] = []
+        self.nodes: List[dict] = []
+        self.pods: List[str] = []
+        self.services: List[str] = []
+        if self.ok:
+            try:
+                items = json.loads(out).get("items", [])
+            except ValueError as e:
+                self.ok, self.error, items = False, f"unparseable kubectl output: {e}", []
+            for it in items:
+                kind, name = it.get("kind"), it.get("metadata",{}).get("name","")
+                if kind=="Namespace": self.namespaces.append(name)
+                elif kind=="Node": self.nodes.append(it)
+                elif kind=="Pod": self.pods.append(name)
+                elif kind=="Service": self.services.append(name)
+
+    @functools.cached_property
+    def crds(self) -> Set[str]:
+        rc, out = run(CRDS_CMD, timeout=15, stderr=False)
+        return {line.rsplit("/", 1)[-1] for line in out.split()} if rc==0 else set()
+
+    @functools.cached_property
+    def rancher_image(self) -> str:
+        rc, out = run(RANCHER_IMAGE_CMD, timeout=15, stderr=False)
+        return out if rc==0 else ""
+
+    def has_ns(self, name:str) -> bool:
+        return name in self.namespaces
+
+    def ns_matching(self, *needles:str) -> List[str]:
+        return [n for n in self.namespaces if any(x in n.lower() for x in needles)]
+
+    def node_sample(self) -> str:
+        """`kubectl get nodes -o wide`-style summary of the first node."""
+        if not self.nodes:
+            return ""
+        n = self.nodes[0]
+        st = n.get("status", {})
+        ready = next((c.get("status") for c in st.get("conditions", []) if c.get("type")=="Ready"), "Unknown")
+        ip = next((a.get("address") for a in st.get("addresses", []) if a.get("type")=="InternalIP"), "")
+        info = st.get("nodeInfo", {})
+        return " ".join(x for x in [n["metadata"]["name"], "Ready" if ready=="True" else "NotReady",
+                                   info.get("kubeletVersion",""), ip, info.get("osImage","")] if x)
+
+# -------- kubernetes checks --------
+K8S = "Kubernetes"
+NEEDS_CLUSTER = ("bin:kubectl", "check:cluster")
+
+@check(K8S, "kubectl", cost="cheap", dry_ok=True)
+def k8s_kubectl(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    return [] if which("kubectl") else [("kubectl", status(False, msg="kubectl not installed"))]
+
+@check(K8S, "cluster", requires=("bin:kubectl",))
+def k8s_cluster(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    inv = ctx.k8s
+    rows = [("cluster", status(inv.ok, msg="cluster reachable" if inv.ok else inv.error, timeout=inv.timed_out, fix="Ensure kubeconfig / KUBECONFIG and k3s/rancher are running"))]
+    # k3s server version via node query (fallback to binary handled in CLI section)
+    sample = inv.node_sample()
+    if sample:
+        rows.append(("node-sample", status(True, msg=sample)))
+    return rows
+
+# CNI detection (cilium/calico/flannel)
+@check(K8S, "cni", requires=NEEDS_CLUSTER)
+def k8s_cni(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    pods = " ".join(ctx.k8s.pods)
+    cni = "unknown"
+    if "cilium" in pods: cni="cilium"
+    elif "calico" in pods: cni="calico"
+    elif "flannel" in pods: cni="flannel"
+    rows = [("cni", status(True, msg=f"{cni}"))]
+    if cni=="flannel":
+        rows.append(("networkpolicy", status(None, warn=True, msg="Flannel does not enforce NetworkPolicies", fix="Switch to Cilium or Calico for policy support")))
+    return rows
+
+@check(K8S, "traefik", requires=NEEDS_CLUSTER)
+def k8s_traefik(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    traefik = any("traefik" in s for s in ctx.k8s.services)
+    return [("traefik", status(traefik, msg="Traefik service detected" if traefik else "no traefik service in kube-system"))]
+
+def ns_check(name:str, ns:str, fix:str) -> None:
+    """Register a check that passes when namespace `ns` exists."""
+    @check(K8S, name, requires=NEEDS_CLUSTER)
+    def fn(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+        ok = ctx.k8s.has_ns(ns)
+        return [(name, status(ok, msg=f"{ns} namespace present" if ok else "not installed", fix=fix))]
+
+ns_check("metallb", "metallb-system", "Install MetalLB and configure IPAddressPool + L2Advertisement")
+ns_check("argocd", "argocd", "Install Argo CD (GitOps)")
+
+@check(K8S, "external-secrets", requires=NEEDS_CLUSTER)
+def k8s_external_secrets(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    eso_present = bool({"externalsecrets.external-secrets.io","clustersecretstores.external-secrets.io"} & ctx.k8s.crds)
+    return [("external-secrets", status(eso_present, msg="ESO CRDs found" if eso_present else "ESO not detected", fix="Install External Secrets Operator and configure Vault ClusterSecretStore"))]
+
+ns_check("vault", "vault", "Deploy Vault with Raft + TLS; enable k8s auth")
+ns_check("ory", "ory", "Deploy Kratos + Hydra and consent UI")
+
+# Supabase (namespace or label)
+@check(K8S, "supabase", requires=NEEDS_CLUSTER)
+def k8s_supabase(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    supa = bool(ctx.k8s.ns_matching("supabase","data"))
+    return [("supabase", status(supa, msg="namespace present" if supa else "not detected", fix="Deploy Supabase; expose only Kong (8000/8443)"))]
+
+ns_check("rabbitmq", "rabbitmq", "Deploy RabbitMQ; mgmt internal; metrics 15692")
+
+# LGTM / Grafana
+@check(K8S, "observability", requires=NEEDS_CLUSTER)
+def k8s_observability(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    lgtm = bool(ctx.k8s.ns_matching("lgtm","observability","grafana"))
+    return [("observability", status(lgtm, msg="observability ns present" if lgtm else "not detected", fix="Deploy docker-otel-lgtm (Grafana/Tempo/Loki/Mimir)"))]
+
+@check(K8S, "rancher", requires=NEEDS_CLUSTER)
+def k8s_rancher(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    inv = ctx.k8s
+    # If k3s present but rancher absent -> WARN; else FAIL
+    if inv.ns_matching("cattle-system","rancher"):
+        rows = [("rancher", status(True, msg="rancher/cattle-system ns present"))]
+        # Try get rancher deployment image version
+        if inv.rancher_image:
+            rows.append(("rancher-version", status(True, msg=inv.rancher_image)))
+        return rows
+    # detect k3s by k3s binary / dirs
+    if which("k3s") or Path("/var/lib/rancher/k3s").exists():
+        return [("rancher", status(None, warn=True, msg="k3s present, Rancher not detected", fix="Install Rancher for multi-cluster management or ignore if single cluster"))]
+    return [("rancher", status(False, msg="not detected", fix="Deploy Rancher (cattle-system) if centralized mgmt desired"))]
+
+# Rancher Desktop specific (rdctl) details
+@check(K8S, "rdctl", requires=("bin:rdctl",), cost="slow")
+def k8s_rdctl(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    res = run_all({
+        "version": (["rdctl","version"], 10),
+        # embedded k8s node sample via rdctl shell kubectl
+        "nodes": (["rdctl","shell","kubectl","get","nodes","-o","wide"], 10),
+    })
+    rc, out = res["version"]
+    rows = [("rdctl", status(rc==0, msg=out.splitlines()[0] if out else "installed", timeout=rc==RC_TIMEOUT))]
+    rc, rd_nodes = res["nodes"]
+    lines = rd_nodes.splitlines() if rc==0 else []
+    if len(lines) > 1:
+        rows.append(("rdctl-node", status(True, msg=lines[1])))
+    return rows
+
+@check("Host Ports", "ports", cost="cheap", dry_ok=True)
+def host_ports(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    return check_ports(dry_run=ctx.dry_run)
+
 def summarize(sections: Mapping[str, List[Tuple[str, Dict[str,str]]]]) -> Dict[str,int]:
-    summary: Dict[str,int] = {"PASS":0,"WARN":0,"FAIL":0,"SKIP":0}
+    summary: Dict[str,int] = {"PASS":0,"WARN":0,"FAIL":0,"TIMEOUT":0,"SKIP":0}
     for items in sections.values():
         for _, st in items:
             summary[st["level"]] += 1
     return summary
 
-def to_markdown(sections: Mapping[str, List[Tuple[str, Dict[str,str]]]], summary: Mapping[str,int]) -> str:
+def to_markdown(sections: Mapping[str, List[Tuple[str, Dict[str,str]]]], summary: Mapping[str,int], timings: Optional[List[dict]]=None,
+                delta: Optional[Mapping[str, object]]=None) -> str:
+    """Render the report; with `delta` (from diff_reports) only changed checks are listed."""
     def badge(level: str) -> str:
-        mapping = {"PASS":"✅","WARN":"⚠️","FAIL":"❌","SKIP":"⏭️"}
+        mapping = {"PASS":"✅","WARN":"⚠️","FAIL":"❌","TIMEOUT":"⏱️","SKIP":"⏭️"}
         return mapping.get(level, level)
+    changes: List[dict] = list(delta["changes"]) if delta is not None else []  # type: ignore[arg-type]
+    changed = {(c["section"], c["check"]) for c in changes}
     lines: List[str] = []
     lines.append(f"# Homelab Readiness Report\nGenerated: {datetime.now(timezone.utc).isoformat()}\n")
-    lines.append(f"**Summary:** ✅ {summary['PASS']}  ⚠️ {summary['WARN']}  ❌ {summary['FAIL']}  ⏭️ {summary['SKIP']}\n")
+    lines.append(f"**Summary:** ✅ {summary['PASS']}  ⚠️ {summary['WARN']}  ❌ {summary['FAIL']}  ⏱️ {summary['TIMEOUT']}  ⏭️ {summary['SKIP']}\n")
+    if delta is not None:
+        lines.append(f"_Changes since {delta.get('baseline_generated_at') or 'no baseline'}: {len(changes)}_\n")
     for name, items in sections.items():
+        if delta is not None:
+            items = [(c, st) for c, st in items if (name, c) in changed]
+            if not items:
+                continue
         lines.append(f"## {name}")
         lines.append("| Check | Status | Message | Fix Hint |")
         lines.append("|---|---|---|---|")
         for check, st in items:
             lines.append(f"| `{check}` | {badge(st['level'])} {st['level']} | {st['message'].replace('|','/')} | {st['fix'].replace('|','/') if st['fix'] else ''} |")
         lines.append("")
+    removed = [c for c in changes if c["change"]=="removed"]
+    if removed:
+        lines.append("## Removed checks")
+        lines.append("| Section | Check | Last status |")
+        lines.append("|---|---|---|")
+        for c in removed:
+            lines.append(f"| {c['section']} | `{c['check']}` | {badge(c['from']['level'])} {c['from']['level']} |")
+        lines.append("")
+    if timings:
+        lines.append("## Slowest probes")
+        lines.append("| Probe | Seconds | Exit | Timeout | Output bytes |")
+        lines.append("|---|---|---|---|---|")
+        for t in timings[:10]:
+            lines.append(f"| `{t['probe'].replace('|','/')}` | {t['seconds']:.3f} | {'' if t['rc'] is None else t['rc']} | {'⏱️' if t['timeout'] else ''} | {t['output_bytes']} |")
+        lines.append("")
     return "\n".join(lines)
 
-def main():
-    args = parse_args()
-    outdir = Path(args.out); outdir.mkdir(parents=True, exist_ok=True)
+Sections = Dict[str, List[Tuple[str, Dict[str,str]]]]
 
-    dry = args.dry_run
+# -------- deltas --------
+def load_report(path:Path) -> Optional[dict]:
+    try:
+        return json.loads(path.read_text())
+    except (OSError, ValueError):
+        return None
+
+def diff_reports(prev:Optional[Mapping], cur:Mapping) -> Dict[str, object]:
+    """Transitions between two readiness.json documents, keyed by (section, check).
 
-    sections = {
-        "OS & Platform": check_os_env(),  # local file reads ok in dry-run
-        "CLI Tooling": check_cmds(dry_run=dry),
-        "Kubernetes": check_k8s(dry_run=dry),
-        "Host Ports": check_ports(dry_run=dry),
+    Each change is `level`, `message`, `added` or `removed`, with `from`/`to` carrying
+    {level, message}. Without a baseline every check counts as added.
+    """
+    def index(report:Optional[Mapping]) -> Dict[Tuple[str,str], dict]:
+        if not report:
+            return {}
+        return {(sec, it["check"]): it for sec, items in report.get("sections", {}).items() for it in items}
+    old, new = index(prev), index(cur)
+    changes: List[dict] = []
+    for key, it in new.items():
+        was = old.get(key)
+        if was is None:
+            kind = "added"
+        elif was["level"] != it["level"]:
+            kind = "level"
+        elif was["message"] != it["message"]:
+            kind = "message"
+        else:
+            continue
+        changes.append({"section":key[0], "check":key[1], "change":kind,
+                        "from": {"level":was["level"], "message":was["message"]} if was else None,
+                        "to": {"level":it["level"], "message":it["message"]}})
+    for key, was in old.items():
+        if key not in new:
+            changes.append({"section":key[0], "check":key[1], "change":"removed",
+                            "from": {"level":was["level"], "message":was["message"]}, "to": None})
+    counts = {k: sum(1 for c in changes if c["change"]==k) for k in ("level","message","added","removed")}
+    return {
+        "generated_at": cur.get("generated_at"),
+        "baseline_generated_at": prev.get("generated_at") if prev else None,
+        "summary": cur.get("summary"),
+        "counts": counts,
+        "changes": changes,
     }
-    summary = summarize(sections)
 
+def append_history(path:Path, delta:Mapping, limit:int) -> None:
+    """Append a delta record, compacting to the newest `limit` records once the log
+    reaches twice that size (so the rewrite cost is amortised)."""
+    if limit <= 0 or not delta["changes"]:
+        return
+    with open(path, "a", encoding="utf-8") as f:
+        f.write(json.dumps(delta) + "\n")
+    with open(path, encoding="utf-8") as f:
+        lines = f.readlines()
+    if len(lines) >= 2*limit:
+        tmp = path.with_suffix(".tmp")
+        tmp.write_text("".join(lines[-limit:]), encoding="utf-8")
+        tmp.replace(path)
+
+def carry_over(prev:Optional[Mapping], data:Mapping) -> Tuple[Optional[dict], dict]:
+    """Split the baseline of a partial run (--only/--skip/--fast) by what ran this time.
+
+    Returns (baseline limited to the checks that ran, `data` plus the baseline rows of the
+    checks that did not run). The first is what the delta is taken against; the second
+    is written as the next baseline, so a partial run neither reports the unselected
+    checks as removed nor makes the next full run report them as added. Rows are tied to
+    checks through the report's `checks` map; a baseline section without one is carried
+    over whole when none of its checks ran.
+    """
+    if not prev:
+        return prev, dict(data)
+    ran = {(sec, c) for sec, m in data.get("checks", {}).items() for c in m}
+    prev_owners: Mapping[str, Mapping[str, List[str]]] = prev.get("checks") or {}
+    keep: Set[Tuple[str, str]] = set()
+    owners: Dict[str, Dict[str, List[str]]] = {sec: dict(m) for sec, m in data.get("checks", {}).items()}
+    for sec, items in prev.get("sections", {}).items():
+        if sec in prev_owners:
+            for c, rows in prev_owners[sec].items():
+                if (sec, c) not in ran:
+                    keep.update((sec, r) for r in rows)
+                    owners.setdefault(sec, {})[c] = rows
+        elif sec not in data["sections"]:
+            keep.update((sec, it["check"]) for it in items)
+    base = dict(prev, sections={sec: [it for it in items if (sec, it["check"]) not in keep]
+                                for sec, items in prev.get("sections", {}).items()})
+    merged: Dict[str, List[dict]] = {}
+    for sec in list(prev.get("sections", {})) + [s for s in data["sections"] if s not in prev.get("sections", {})]:
+        rows = list(data["sections"].get(sec, [])) + [it for it in prev.get("sections", {}).get(sec, []) if (sec, it["check"]) in keep]
+        if rows:
+            merged[sec] = rows
+    summary = {level: 0 for level in data["summary"]}
+    for items in merged.values():
+        for it in items:
+            summary[it["level"]] = summary.get(it["level"], 0) + 1
+    return base, dict(data, summary=summary, sections=merged, checks=owners)
+
+def write_reports(outdir:Optional[Path], sections:Sections, fmt:str, dry:bool,
+                  changed_only:bool=False, history:int=500, profile:bool=False,
+                  owners:Optional[Mapping[str, Mapping[str, List[str]]]]=None, partial:bool=False) -> Dict[str,int]:
+    """Write readiness.json/readiness.md into outdir, or the JSON report to stdout when outdir is None.
+
+    The previous readiness.json is the baseline for readiness.delta.json and the
+    rolling readiness.history.ndjson log, so it is rewritten for every format --
+    `--format md --changed-only` needs it as much as the JSON report does. `owners`
+    ({section: {check: row names}}) is stored with it; on a `partial` run only the checks
+    that ran are diffed and the rest of the baseline is kept (see carry_over).
+    """
+    summary = summarize(sections)
+    timings = PROFILE.timings() if profile else None
     data: Dict[str, object] = {
         "generated_at": datetime.now(timezone.utc).isoformat(),
         "dry_run": dry,
         "summary": summary,
         "sections": {k:[{"check":c, **s} for c,s in v] for k,v in sections.items()}
     }
+    if timings is not None:
+        data["timings"] = timings
+    if outdir is None:
+        sys.stdout.write(json.dumps(data) + "\n")
+        sys.stdout.flush()
+        return summary
+    if owners is not None:
+        data["checks"] = {sec: dict(owners[sec]) for sec in sections if sec in owners}
+    prev = load_report(outdir/"readiness.json")
+    baseline = data
+    if partial:
+        prev, baseline = carry_over(prev, data)
+    delta = diff_reports(prev, data)
+    (outdir/"readiness.delta.json").write_text(json.dumps(delta, indent=2))
+    (outdir/"readiness.json").write_text(json.dumps(baseline, indent=2))
+    append_history(outdir/"readiness.history.ndjson", delta, history)
+    if fmt in ("md","both"):
+        (outdir/"readiness.md").write_text(to_markdown(sections, summary, timings, delta if changed_only else None))
+    return summary
+
+class NdjsonStream:
+    """Line-per-check JSON output, flushed per line so pipes and promtail see results
+    as soon as each check finishes. Ends each run with a `summary` line."""
+    def __init__(self, stream:TextIO, profile:bool=False):
+        self.stream, self.profile = stream, profile
+        self.lock = threading.Lock()
 
-    if args.format in ("json","both"):
-        (outdir/"readiness.json").write_text(json.dumps(data, indent=2))
-    if args.format in ("md","both"):
-        (outdir/"readiness.md").write_text(to_markdown(sections, summary))
+    def _write(self, obj:dict) -> None:
+        line = json.dumps(obj) + "\n"
+        with self.lock:  # checks of several sections finish on different threads
+            self.stream.write(line)
+            self.stream.flush()
+
+    def check(self, section:str, check:str, st:Mapping[str,str]) -> None:
+        self._write({"type":"check", "ts":datetime.now(timezone.utc).isoformat(), "section":section, "check":check, **st})
+
+    def rows(self, section:str, rows:List[Tuple[str, Dict[str,str]]]) -> None:
+        for check, st in rows:
+            self.check(section, check, st)
+
+    def summary(self, sections:Sections, dry:bool) -> Dict[str,int]:
+        summary = summarize(sections)
+        line: Dict[str, object] = {"type":"summary", "ts":datetime.now(timezone.utc).isoformat(), "dry_run":dry, "summary":summary}
+        if self.profile:
+            line["timings"] = PROFILE.timings()
+        self._write(line)
+        return summary
+
+# -------- metrics --------
+PROBE_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 15.0, 30.0)
+LEVELS = ("PASS","WARN","FAIL","TIMEOUT","SKIP")
+
+def probe_name(cmd:List[str]) -> str:
+    """Low-cardinality label for a probe: the binary plus its first two positional args."""
+    words: List[str] = []
+    skip = False
+    for tok in cmd[1:]:
+        if skip:
+            skip = False
+        elif tok in ("-n","--namespace"):
+            skip = True
+        elif not tok.startswith("-"):
+            words.append(tok)
+        if len(words) == 2:
+            break
+    return " ".join([cmd[0]] + words)
+
+def _label(v:str) -> str:
+    return v.replace("\\","\\\\").replace("\"","\\\"").replace("\n","\\n")
+
+class Metrics:
+    """Thread-safe store behind the /metrics endpoint (Prometheus text format 0.0.4)."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hist: Dict[str, List[float]] = {}  # probe -> bucket counts + [sum, count]
+        self.sections: Sections = {}
+        self.updated: Dict[str, float] = {}
+
+    def observe(self, cmd:List[str], seconds:float) -> None:
+        name = probe_name(cmd)
+        with self.lock:
+            h = self.hist.setdefault(name, [0.0]*(len(PROBE_BUCKETS)+2))
+            for i, le in enumerate(PROBE_BUCKETS):
+                if seconds <= le:
+                    h[i] += 1
+            h[-2] += seconds
+            h[-1] += 1
+
+    def set_section(self, name:str, rows:List[Tuple[str, Dict[str,str]]]) -> None:
+        with self.lock:
+            self.sections[name] = rows
+            self.updated[name] = time.time()
+
+    def render(self) -> str:
+        with self.lock:
+            sections = dict(self.sections)
+            hist = {k: list(v) for k, v in self.hist.items()}
+            updated = dict(self.updated)
+        out: List[str] = []
+        out.append("# HELP homelab_readiness_check Current level of each readiness check (1 for the active level).")
+        out.append("# TYPE homelab_readiness_check gauge")
+        for sec, rows in sections.items():
+            for check, st in rows:
+                for lvl in LEVELS:
+                    out.append(f'homelab_readiness_check{{section="{_label(sec)}",check="{_label(check)}",level="{lvl}"}} {int(st["level"]==lvl)}')
+        out.append("# HELP homelab_readiness_summary Number of checks per level.")
+        out.append("# TYPE homelab_readiness_summary gauge")
+        for lvl, n in summarize(sections).items():
+            out.append(f'homelab_readiness_summary{{level="{lvl}"}} {n}')
+        out.append("# HELP homelab_readiness_section_last_run_timestamp_seconds When each section was last evaluated.")
+        out.append("# TYPE homelab_readiness_section_last_run_timestamp_seconds gauge")
+        for sec, ts in updated.items():
+            out.append(f'homelab_readiness_section_last_run_timestamp_seconds{{section="{_label(sec)}"}} {ts:.3f}')
+        out.append("# HELP homelab_readiness_probe_duration_seconds Wall time of subprocess probes.")
+        out.append("# TYPE homelab_readiness_probe_duration_seconds histogram")
+        for name, h in sorted(hist.items()):
+            lbl = _label(name)
+            for le, n in zip(PROBE_BUCKETS, h):
+                out.append(f'homelab_readiness_probe_duration_seconds_bucket{{probe="{lbl}",le="{le}"}} {int(n)}')
+            out.append(f'homelab_readiness_probe_duration_seconds_bucket{{probe="{lbl}",le="+Inf"}} {int(h[-1])}')
+            out.append(f'homelab_readiness_probe_duration_seconds_sum{{probe="{lbl}"}} {h[-2]:.6f}')
+            out.append(f'homelab_readiness_probe_duration_seconds_count{{probe="{lbl}"}} {int(h[-1])}')
+        return "\n".join(out) + "\n"
+
+METRICS = Metrics()
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = METRICS.render().encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def serve_metrics(listen:str) -> ThreadingHTTPServer:
+    """Start the /metrics endpoint on a daemon thread; `listen` is "[host]:port"."""
+    host, _, port = listen.rpartition(":")
+    srv = ThreadingHTTPServer((host or "0.0.0.0", int(port)), _MetricsHandler)
+    threading.Thread(target=srv.serve_forever, daemon=True, name="metrics").start()
+    return srv
+
+# -------- profiling --------
+class Profiler:
+    """Per-probe timing records collected by run() when --profile or the history store is on.
+
+    Records are kept in a bounded deque so a long-running --watch process cannot grow
+    without limit; a timeout is reported with rc None and timeout True.
+    """
+    def __init__(self, maxlen:int=2000):
+        self.enabled = False
+        self.lock = threading.Lock()
+        self.records: "deque[dict]" = deque(maxlen=maxlen)
+        self.drained = 0
+
+    def record(self, cmd:List[str], start_ns:int, seconds:float, rc:Optional[int], timed_out:bool, out_bytes:int) -> None:
+        if not self.enabled:
+            return
+        with self.lock:
+            self.records.append({"probe": " ".join(cmd), "seconds": round(seconds, 4), "rc": rc,
+                                 "timeout": timed_out, "output_bytes": out_bytes, "start_ns": start_ns})
+
+    def drain(self) -> List[dict]:
+        """Records added since the previous drain (what the history store appends per run)."""
+        with self.lock:
+            fresh = [r for r in self.records if r["start_ns"] > self.drained]
+            if fresh:
+                self.drained = max(r["start_ns"] for r in fresh)
+        return fresh
+
+    def timings(self) -> List[dict]:
+        """Records sorted slowest first (without the raw start timestamps)."""
+        with self.lock:
+            recs = list(self.records)
+        return [{k:v for k,v in r.items() if k!="start_ns"} for r in sorted(recs, key=lambda r: -r["seconds"])]
+
+    def write_otlp(self, path:Path, service:str="homelab-readiness-audit") -> None:
+        """Write recorded probes as one trace in OTLP/JSON (loadable via the collector's
+        otlpjsonfile receiver into Tempo): a root `audit` span with one child per probe."""
+        with self.lock:
+            recs = list(self.records)
+        if not recs:
+            return
+        trace_id = os.urandom(16).hex()
+        root_id = os.urandom(8).hex()
+        start = min(r["start_ns"] for r in recs)
+        end = max(r["start_ns"] + int(r["seconds"]*1e9) for r in recs)
+        def attr(k:str, v:object) -> dict:
+            if isinstance(v, bool):
+                return {"key":k, "value":{"boolValue":v}}
+            if isinstance(v, int):
+                return {"key":k, "value":{"intValue":str(v)}}
+            return {"key":k, "value":{"stringValue":str(v)}}
+        spans = [{"traceId":trace_id, "spanId":root_id, "name":"audit", "kind":1,
+                  "startTimeUnixNano":str(start), "endTimeUnixNano":str(end)}]
+        for r in recs:
+            attrs = [attr("process.command_line", r["probe"]), attr("audit.timeout", r["timeout"]),
+                     attr("audit.output_bytes", r["output_bytes"])]
+            if r["rc"] is not None:
+                attrs.append(attr("process.exit_code", r["rc"]))
+            spans.append({"traceId":trace_id, "spanId":os.urandom(8).hex(), "parentSpanId":root_id,
+                          "name":probe_name(r["probe"].split()), "kind":1,
+                          "startTimeUnixNano":str(r["start_ns"]),
+                          "endTimeUnixNano":str(r["start_ns"] + int(r["seconds"]*1e9)),
+                          "attributes":attrs,
+                          "status":{"code": 2 if r["timeout"] or r["rc"] not in (0, None) else 1}})
+        doc = {"resourceSpans":[{"resource":{"attributes":[attr("service.name", service)]},
+                                 "scopeSpans":[{"scope":{"name":"audit_readiness"}, "spans":spans}]}]}
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(doc) + "\n")
+
+PROFILE = Profiler()
+
+# -------- history store --------
+def open_store(path:Path) -> Any:
+    """ReportStore from audit_history.py next to this script, or None when it is not
+    available (e.g. the script was streamed over stdin)."""
+    try:
+        from audit_history import ReportStore
+    except ImportError:
+        print("[store] audit_history.py not importable; runs are not recorded", file=sys.stderr)
+        return None
+    try:
+        return ReportStore(path)
+    except Exception as e:
+        print(f"[store] cannot open {path}: {e}; runs are not recorded", file=sys.stderr)
+        return None
+
+def record_run(store:Any, sections:Sections, source:str) -> None:
+    try:
+        store.append(sections, source=source, timings=PROFILE.drain())
+    except Exception as e:  # a locked or full store must not fail the audit
+        print(f"[store] could not record run: {e}", file=sys.stderr)
+
+# -------- watch mode --------
+# Seconds between re-checks of each section in --watch mode. Kubernetes is mainly driven
+# by kubectl watch streams; its interval is only a periodic resync.
+WATCH_INTERVALS: Dict[str, float] = {
+    "OS & Platform": 3600.0,
+    "CLI Tooling": 3600.0,
+    "Kubernetes": 300.0,
+    "Host Ports": 5.0,
+    "GitOps Manifests": 60.0,
+}
+K8S_WATCH_CMDS = [
+    ["kubectl","get","namespaces","--watch-only","-o","name"],
+    ["kubectl","-n","kube-system","get","pods","--watch-only","-o","name"],
+    ["kubectl","-n","kube-system","get","services","--watch-only","-o","name"],
+    ["kubectl","get","crd","--watch-only","-o","name"],
+]
+K8S_DEBOUNCE = 2.0
+
+class KubeWatch:
+    """Long-running `kubectl get --watch-only` streams that set `wake` on every event.
+
+    Streams that exit (API server restart, expired watch) are restarted with backoff.
+    """
+    def __init__(self, wake:threading.Event, cmds:List[List[str]]=K8S_WATCH_CMDS):
+        self.wake, self.stop = wake, threading.Event()
+        self.procs: List[subprocess.Popen] = []
+        self.lock = threading.Lock()
+        self.threads = [threading.Thread(target=self._stream, args=(c,), daemon=True) for c in cmds]
+        for t in self.threads:
+            t.start()
+
+    def _stream(self, cmd:List[str]) -> None:
+        backoff = 1.0
+        while not self.stop.is_set():
+            try:
+                p = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+            except OSError:
+                return
+            with self.lock:
+                self.procs.append(p)
+            started = time.monotonic()
+            for _ in p.stdout:
+                self.wake.set()
+            p.wait()
+            with self.lock:
+                self.procs.remove(p)
+            if time.monotonic() - started > 60:
+                backoff = 1.0
+            self.stop.wait(backoff)
+            backoff = min(backoff*2, 300.0)
+
+    def close(self) -> None:
+        self.stop.set()
+        with self.lock:
+            for p in self.procs:
+                p.terminate()
+
+def watch(checks:Mapping[str, Callable[[], List[Tuple[str, Dict[str,str]]]]], report:Callable[[Sections], Dict[str,int]], dry:bool,
+          intervals:Mapping[str,float]=WATCH_INTERVALS, stream:Optional[NdjsonStream]=None,
+          record:Optional[Callable[[Sections], None]]=None) -> None:
+    """Re-run each section when due and rewrite reports only when some check's level changes.
+
+    With an NDJSON stream, only the checks whose level changed are emitted (plus a summary).
+    `record` gets every pass (the sections re-run in it), changed or not.
+
+    Between runs the loop blocks on an Event (set by kubectl watch streams), so the
+    process is idle until the next section is due or the cluster changes.
+    """
+    sections: Sections = {name: [] for name in checks}
+    levels: Dict[str, Dict[str,str]] = {}
+    due = {name: 0.0 for name in checks}
+    wake = threading.Event()
+    kube = KubeWatch(wake) if "Kubernetes" in checks and which("kubectl") and not dry else None
+    try:
+        while True:
+            now = time.monotonic()
+            if wake.is_set():
+                wake.clear()
+                due["Kubernetes"] = min(due["Kubernetes"], now + K8S_DEBOUNCE)
+            changed: List[str] = []
+            changed_rows: List[Tuple[str, str, Dict[str,str]]] = []
+            ran: List[str] = []
+            for name, fn in checks.items():
+                if due[name] > now:
+                    continue
+                sections[name] = fn()
+                ran.append(name)
+                METRICS.set_section(name, sections[name])
+                new = {c: st["level"] for c, st in sections[name]}
+                old = levels.get(name)
+                if old != new:
+                    changed_rows += [(name, c, st) for c, st in sections[name] if old is None or old.get(c) != st["level"]]
+                    for c in sorted(set(new) | set(old or {})):
+                        if old is not None and old.get(c) != new.get(c):
+                            changed.append(f"{name}/{c}: {old.get(c,'-')} -> {new.get(c,'-')}")
+                    if old is None:
+                        changed.append(f"{name}: initial")
+                    levels[name] = new
+                due[name] = time.monotonic() + intervals.get(name, 300.0)
+            if ran and record is not None:
+                record({name: sections[name] for name in ran})
+            if changed:
+                if stream is not None:
+                    for sec, c, st in changed_rows:
+                        stream.check(sec, c, st)
+                    summary = stream.summary(sections, dry)
+                else:
+                    summary = report(sections)
+                for line in changed:
+                    print(f"[watch] {line}", file=sys.stderr)
+                print(f"[watch] reports updated: {summary}", file=sys.stderr, flush=True)
+            wake.wait(timeout=max(0.0, min(due.values()) - time.monotonic()))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if kube is not None:
+            kube.close()
+
+def main():
+    args = parse_args()
+    only = [p for v in args.only or [] for p in v.split(",") if p]
+    skip = [p for v in args.skip or [] for p in v.split(",") if p]
+    load_plugins(only, skip)
+    selected = select_checks(only, skip, args.fast)
+    if args.list_checks:
+        for section, sel in selected.items():
+            for c in sel:
+                print(f"{section_slug(section)}/{c.name}\t{c.cost}\t{','.join(c.requires) or '-'}")
+        return
+    if not selected:
+        print("No checks selected (see --list-checks).", file=sys.stderr); sys.exit(1)
+    outdir = None if args.out == "-" else Path(args.out)
+    if outdir is not None:
+        outdir.mkdir(parents=True, exist_ok=True)
+
+    dry = args.dry_run
+
+    global _PROBES, _DEADLINE
+    # In watch mode the process lives indefinitely; only per-probe timeouts apply.
+    if args.deadline > 0 and not (args.watch or args.metrics):
+        _DEADLINE = time.monotonic() + args.deadline
+    store = None
+    if not (args.no_store or dry) and (args.store or outdir is not None):
+        store = open_store(Path(args.store) if args.store else outdir/"readiness.db")
+    PROFILE.enabled = args.profile or store is not None
+    cache = None if args.no_cache or outdir is None else ProbeCache(outdir/".cache"/"probes.json", ttl=args.cache_ttl)
+    jobs = max(1, args.jobs)
+    _PROBES = ProbeLoop(jobs)
+    # A fresh Context per call, so watch mode never reuses an old cluster snapshot.
+    owners: Dict[str, Dict[str, List[str]]] = {}
+    def run_checks(sel:List[Check], emit=None) -> List[Tuple[str, Dict[str,str]]]:
+        own: Dict[str, List[str]] = {}
+        rows = run_section(sel, Context(dry, cache, args, outdir), emit, own)
+        owners[sel[0].section] = own
+        if cache is not None:
+            cache.save()
+        return rows
+    checks: Dict[str, Callable[..., List[Tuple[str, Dict[str,str]]]]] = {
+        section: functools.partial(run_checks, sel) for section, sel in selected.items()
+    }
+    stream: Optional[NdjsonStream] = None
+    if args.format == "ndjson":
+        stream = NdjsonStream(sys.stdout if outdir is None else open(outdir/"readiness.ndjson", "w", encoding="utf-8"),
+                              profile=args.profile)
+    if args.metrics:
+        serve_metrics(args.metrics)
+    report = functools.partial(write_reports, outdir, fmt=args.format, dry=dry,
+                               changed_only=args.changed_only, history=args.history, profile=args.profile,
+                               owners=owners, partial=bool(only or skip or args.fast))
+    if args.watch or args.metrics:
+        try:
+            watch(checks, report, dry, stream=stream,
+                  record=None if store is None else functools.partial(record_run, store, source="watch"))
+        finally:
+            _PROBES.close()
+        return
+    # Sections run side by side (they only wait on probes submitted to the probe loop, and
+    # every probe is bounded by the deadline, so a slow cluster yields a partial report
+    # with TIMEOUT rows); NDJSON lines go out as each check lands, and the dict is
+    # rebuilt in declaration order to keep report order.
+    done: Sections = {}
+    try:
+        with ThreadPoolExecutor(max_workers=len(checks) if jobs > 1 else 1, thread_name_prefix="section") as ex:
+            futures = {ex.submit(fn, None if stream is None else stream.rows): name for name, fn in checks.items()}
+            for fut in as_completed(futures):
+                done[futures[fut]] = fut.result()
+    finally:
+        _PROBES.close()
+    sections = {name: done[name] for name in checks}
+    if stream is not None:
+        summary = stream.summary(sections, dry)
+    else:
+        summary = report(sections)
+    if store is not None:
+        record_run(store, sections, source="oneshot")
+    if args.profile and args.trace_file:
+        PROFILE.write_otlp(Path(args.trace_file))
 
     # Exit policy
-    if args.strict and summary["FAIL"]>0:
+    if args.strict and summary["FAIL"] + summary["TIMEOUT"] > 0:
         sys.exit(2)
 
 if __name__=="__main__":
@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Benchmark harness for audit_readiness.py.
+
+Builds a directory of stub executables (kubectl, ss, systemctl and every KNOWN_CMDS
+binary) with configurable latency and output size, puts it first on PATH and times the
+CLI Tooling and Kubernetes sections (through run_section, as main() runs them),
+check_ports and the full main() against it. Each scenario runs
+in a fresh interpreter so peak RSS is per scenario; every stub invocation appends to a
+log so the subprocess count is exact.
+
+    python3 tools/audit/bench_audit.py --namespaces 10000 --sockets 50000 --crds 200
+    python3 tools/audit/bench_audit.py --save bench.json        # record a baseline
+    python3 tools/audit/bench_audit.py --compare bench.json     # exit 3 on regression
+
+No third-party deps. Linux only (uses resource + fake procfs files).
+"""
+import argparse, json, os, resource, statistics, subprocess, sys, tempfile, time
+from pathlib import Path
+from typing import Dict, List
+
+HERE = Path(__file__).resolve().parent
+# section scenarios run every registered check of that section
+SECTIONS = {"cli-tooling": "CLI Tooling", "kubernetes": "Kubernetes"}
+SCENARIOS = [*SECTIONS, "check_ports", "check_ports_ss", "main"]
+
+# -------- fixtures --------
+def _stub(path:Path, body:str) -> None:
+    path.write_text("#!/bin/sh\n"
+                    'echo "$0 $*" >> "$BENCH_CALLS"\n'
+                    'sleep "$BENCH_LATENCY"\n' + body)
+    path.chmod(0o755)
+
+def build_fixtures(root:Path, namespaces:int, sockets:int, crds:int, output_bytes:int) -> Path:
+    """Write stub binaries and their canned outputs under root; returns the bin dir."""
+    sys.path.insert(0, str(HERE))
+    import audit_readiness as ar
+
+    data, bindir = root/"data", root/"bin"
+    data.mkdir(parents=True); bindir.mkdir(parents=True)
+    items = [{"kind":"Namespace","metadata":{"name":f"ns-{i}"}} for i in range(namespaces)]
+    items += [{"kind":"Namespace","metadata":{"name":n}} for n in ("kube-system","vault","argocd","cattle-system")]
+    items.append({"kind":"Node","metadata":{"name":"bench-node"},"status":{
+        "conditions":[{"type":"Ready","status":"True"}],
+        "addresses":[{"type":"InternalIP","address":"10.0.0.10"}],
+        "nodeInfo":{"kubeletVersion":"v1.30.0+k3s1","osImage":"Ubuntu 24.04"}}})
+    items += [{"kind":"Pod","metadata":{"name":f"cilium-{i}"}} for i in range(10)]
+    items.append({"kind":"Service","metadata":{"name":"traefik"}})
+    (data/"snapshot.json").write_text(json.dumps({"kind":"List","items":items}))
+    res = [f"crd{i}.bench.example.io" for i in range(crds)] + ["externalsecrets.external-secrets.io"]
+    (data/"crds.txt").write_text("".join(f"customresourcedefinition.apiextensions.k8s.io/{r}\n" for r in res))
+    (data/"nodes.txt").write_text("NAME STATUS\nbench-node Ready\n")
+
+    # ss -lnt style dump plus equivalent /proc/net/tcp so both port paths see the same sockets
+    ss = ["State Recv-Q Send-Q Local Address:Port Peer Address:Port"]
+    proc = ["  sl  local_address rem_address   st tx_queue rx_queue tr tm->when retrnsmt   uid  timeout inode"]
+    for i in range(sockets):
+        port = 1024 + i % 60000
+        ss.append(f"LISTEN 0 4096 10.{i//65536%256}.{i//256%256}.{i%256}:{port} 0.0.0.0:*")
+        addr = f"{i%256:02X}{i//256%256:02X}{i//65536%256:02X}0A"  # 10.x.y.z, little-endian
+        proc.append(f"{i:4d}: {addr}:{port:04X} 00000000:0000 0A 00000000:00000000 00:00000000 00000000 0 0 {i} 1")
+    (data/"ss.txt").write_text("\n".join(ss) + "\n")
+    (data/"tcp").write_text("\n".join(proc) + "\n")
+    (data/"tcp6").write_text(proc[0] + "\n")
+
+    filler = "x" * max(0, output_bytes)
+    _stub(bindir/"kubectl", f'''case "$*" in
+  *namespaces,nodes,pods,services*) cat "{data}/snapshot.json" ;;
+  *" crd "*) cat "{data}/crds.txt" ;;
+  *jsonpath*) echo "rancher/rancher:v2.9.0" ;;
+  *nodes*) cat "{data}/nodes.txt" ;;
+  *) echo "kubectl bench {filler}" ;;
+esac
+''')
+    _stub(bindir/"ss", f'cat "{data}/ss.txt"\n')
+    _stub(bindir/"systemctl", 'echo running\n')
+    _stub(bindir/"rdctl", f'case "$*" in *nodes*) cat "{data}/nodes.txt" ;; *) echo "rdctl bench {filler}" ;; esac\n')
+    for cmd in ar.KNOWN_CMDS.values():
+        if not (bindir/cmd[0]).exists():
+            _stub(bindir/cmd[0], f'echo "{cmd[0]} v0.0.0-bench {filler}"\n')
+    return bindir
+
+# -------- scenario runner (child process) --------
+def run_scenario(name:str, root:Path, jobs:int) -> Dict[str, float]:
+    sys.path.insert(0, str(HERE))
+    import audit_readiness as ar
+
+    ar.PROC_NET_TCP = (str(root/"data"/"tcp"), str(root/"data"/"tcp6"))
+    if name == "check_ports_ss":
+        ar.PROC_NET_TCP = ()
+    started = time.perf_counter()
+    if name == "main":
+        sys.argv = ["audit_readiness.py", "--out", str(root/"out"), "--no-cache", "--jobs", str(jobs)]
+        ar.main()
+    else:
+        ar._PROBES = ar.ProbeLoop(jobs)
+        if name in SECTIONS:
+            rows = ar.run_section(ar.REGISTRY[SECTIONS[name]], ar.Context())
+        else:
+            rows = getattr(ar, name.replace("_ss", ""))()
+        assert rows, f"{name} returned no rows"
+    wall = time.perf_counter() - started
+    return {"wall": wall, "rss_kb": peak_rss_kb()}
+
+def peak_rss_kb() -> float:
+    # VmHWM resets on exec; ru_maxrss can carry over the forking parent's peak
+    try:
+        for line in Path("/proc/self/status").read_text().splitlines():
+            if line.startswith("VmHWM:"):
+                return float(line.split()[1])
+    except OSError:
+        pass
+    return float(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+
+def measure(name:str, root:Path, bindir:Path, jobs:int, latency:float) -> Dict[str, float]:
+    calls = root/f"calls-{name}.log"
+    calls.write_text("")
+    env = dict(os.environ, PATH=f"{bindir}:/usr/bin:/bin", BENCH_CALLS=str(calls), BENCH_LATENCY=str(latency))
+    out = subprocess.check_output([sys.executable, __file__, "_run", name, str(root), str(jobs)], env=env, text=True)
+    res = json.loads(out.strip().splitlines()[-1])
+    res["subprocesses"] = len(calls.read_text().splitlines())
+    return res
+
+# -------- reporting --------
+def to_table(results:Dict[str, Dict[str, float]]) -> str:
+    lines = ["| Scenario | Wall s (median) | Wall s (best) | Subprocesses | Peak RSS MB |", "|---|---|---|---|---|"]
+    for name, r in results.items():
+        lines.append(f"| `{name}` | {r['wall']:.3f} | {r['best']:.3f} | {r['subprocesses']} | {r['rss_kb']/1024:.1f} |")
+    return "\n".join(lines)
+
+def regressions(results:Dict[str, Dict[str, float]], baseline:Dict[str, Dict[str, float]], tolerance:float) -> List[str]:
+    bad: List[str] = []
+    for name, r in results.items():
+        b = baseline.get(name)
+        if not b:
+            continue
+        for key in ("wall", "rss_kb", "subprocesses"):
+            if r[key] > b[key] * (1 + tolerance) and r[key] - b[key] > (0.05 if key=="wall" else 0):
+                bad.append(f"{name}: {key} {b[key]:.3f} -> {r[key]:.3f}")
+    return bad
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--namespaces", type=int, default=10000)
+    ap.add_argument("--sockets", type=int, default=50000)
+    ap.add_argument("--crds", type=int, default=200)
+    ap.add_argument("--latency", type=float, default=0.05, help="seconds each stub sleeps")
+    ap.add_argument("--output-bytes", type=int, default=200, help="filler bytes in stub version output")
+    ap.add_argument("--jobs", type=int, default=16)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--scenario", action="append", choices=SCENARIOS, help="limit to these scenarios")
+    ap.add_argument("--save", help="write results JSON (e.g. a baseline)")
+    ap.add_argument("--compare", help="baseline JSON to compare against")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="allowed relative slowdown vs baseline")
+    return ap.parse_args()
+
+def main():
+    if len(sys.argv) == 5 and sys.argv[1] == "_run":
+        print(json.dumps(run_scenario(sys.argv[2], Path(sys.argv[3]), int(sys.argv[4]))))
+        return
+    args = parse_args()
+    results: Dict[str, Dict[str, float]] = {}
+    with tempfile.TemporaryDirectory(prefix="audit-bench-") as tmp:
+        root = Path(tmp)
+        bindir = build_fixtures(root, args.namespaces, args.sockets, args.crds, args.output_bytes)
+        for name in args.scenario or SCENARIOS:
+            runs = [measure(name, root, bindir, args.jobs, args.latency) for _ in range(max(1, args.repeat))]
+            walls = [r["wall"] for r in runs]
+            results[name] = {"wall": statistics.median(walls), "best": min(walls),
+                             "subprocesses": max(r["subprocesses"] for r in runs),
+                             "rss_kb": max(r["rss_kb"] for r in runs)}
+    print(to_table(results))
+    if args.save:
+        Path(args.save).write_text(json.dumps(results, indent=2))
+    if args.compare:
+        bad = regressions(results, json.loads(Path(args.compare).read_text()), args.tolerance)
+        for line in bad:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if bad:
+            sys.exit(3)
+
+if __name__=="__main__":
+    main()
@@ -0,0 +1,13 @@
+"""
+Plugin checks for audit_readiness.py.
+
+Each module here is one report section, named after the section slug with underscores
+(checks/gitops_manifests.py -> "GitOps Manifests" -> gitops-manifests), so --only/--skip
+can rule a plugin out before it is imported. A module registers its checks at import:
+
+    from audit_readiness import Context, check, status
+
+    @check("My Section", "thing", requires=("bin:thing", "ns:thing"), cost="cheap")
+    def thing(ctx: Context):
+        return [("thing", status(True, msg="ok"))]
+"""
@@ -0,0 +1,228 @@
+"""
+GitOps manifest lint: index every YAML file under --deploy-dir and cross-check Ingress
+hosts, Service types and ExternalSecret/SecretStore references.
+
+Loaded by audit_readiness.py only when this section is selected, so PyYAML is imported
+(and required) only here.
+"""
+import hashlib, json, os, re
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Mapping, Optional, Set, Tuple
+
+from audit_readiness import KNOWN_PORTS, Context, check, status
+
+try:
+    import yaml
+except ImportError:
+    yaml = None
+
+SECTION = "GitOps Manifests"
+
+# Host suffixes that never resolve publicly; anything else reached through an Ingress
+# (or any hostname routed by the cloudflared tunnel) counts as public.
+PRIVATE_SUFFIXES = (".lan", ".local", ".internal", ".localdomain", ".home.arpa", ".test", ".svc")
+# Known ports whose description says they must stay off the internet.
+PRIVATE_PORTS = {p for p, d in KNOWN_PORTS.items() if re.search(r"not be public|keep private|internal", d)}
+SECRET_REF_KEYS = {"existingSecret","existingPasswordSecret","existingErlangSecret","extraEnvVarsSecret"}
+PORT_KEYS = {"port","number","containerPort","targetPort","nodePort","servicePort"}
+AUTH_ANNOTATIONS = ("traefik.ingress.kubernetes.io/router.middlewares", "nginx.ingress.kubernetes.io/auth-url")
+# tools/audit/checks/ -> repo root, so the Justfile recipes (run from tools/audit) find it too
+DEPLOY_DIR = Path(__file__).resolve().parents[3]/"deploy"
+# Cached index entries are only valid for the index_doc() that produced them: the cache
+# file is stamped with a hash of this module (and the PyYAML version) and dropped on mismatch.
+INDEXER = hashlib.sha256(Path(__file__).read_bytes() + str(getattr(yaml, "__version__", "")).encode()).hexdigest()[:16]
+
+def _walk(node:Any, visit:Callable[[str, Any, Any], None], parent:Any=None) -> None:
+    if isinstance(node, dict):
+        for k, v in node.items():
+            visit(str(k), v, node)
+            _walk(v, visit, node)
+    elif isinstance(node, list):
+        for v in node:
+            _walk(v, visit, parent)
+
+def _map(v:Any) -> Dict[str, Any]:
+    # Helm values reuse manifest key names (metadata, spec, rules...) for strings and
+    # lists, so nothing below the document root is assumed to be a mapping
+    return v if isinstance(v, dict) else {}
+
+def _list(v:Any) -> List[Any]:
+    return v if isinstance(v, list) else []
+
+def _str(v:Any) -> str:
+    return v if isinstance(v, str) else ""
+
+def index_doc(doc:Mapping) -> Dict[str, Any]:
+    """Flatten one YAML document into the fields the cross-checks need."""
+    meta = _map(doc.get("metadata"))
+    spec = _map(doc.get("spec"))
+    kind = str(doc.get("kind") or "")
+    entry: Dict[str, Any] = {"kind":kind, "name":_str(meta.get("name")), "namespace":_str(meta.get("namespace")),
+                             "hosts":[], "ports":[], "routes":[], "tunnel_hosts":[], "secret_refs":[],
+                             "secret_produces":[], "store_refs":[], "stores":[], "service_type":"",
+                             "auth": any(a in _map(meta.get("annotations")) for a in AUTH_ANNOTATIONS)}
+    def visit(k:str, v:Any, parent:Any) -> None:
+        if k in PORT_KEYS and isinstance(v, int):
+            entry["ports"].append(v)
+        elif k in ("host","hostname") and isinstance(v, str) and "." in v:
+            entry["hosts"].append(v)
+        elif k in SECRET_REF_KEYS and isinstance(v, str) and v:
+            entry["secret_refs"].append(v)
+        elif k in ("secretKeyRef","secretRef") and isinstance(v, dict) and isinstance(v.get("name"), str) and v["name"]:
+            entry["secret_refs"].append(v["name"])
+        elif k == "secretName" and isinstance(v, str) and v and kind != "Certificate":
+            entry["secret_refs"].append(v)
+    _walk(doc, visit)
+    if kind == "Ingress":
+        for rule in map(_map, _list(spec.get("rules"))):
+            for path in map(_map, _list(_map(rule.get("http")).get("paths"))):
+                svc = _map(_map(path.get("backend")).get("service"))
+                port = _map(svc.get("port")).get("number")
+                entry["routes"].append({"host":_str(rule.get("host")), "service":_str(svc.get("name")),
+                                        "port":port if isinstance(port, int) else None})
+    elif kind == "ExternalSecret":
+        ref = _map(spec.get("secretStoreRef"))
+        entry["store_refs"].append({"kind":_str(ref.get("kind")) or "SecretStore", "name":_str(ref.get("name"))})
+        entry["secret_produces"].append(_str(_map(spec.get("target")).get("name")) or entry["name"])
+    elif kind in ("ClusterSecretStore","SecretStore"):
+        entry["stores"].append({"kind":kind, "name":entry["name"]})
+    elif kind == "Certificate" and _str(spec.get("secretName")):
+        entry["secret_produces"].append(spec["secretName"])
+    elif kind == "Secret":
+        entry["secret_produces"].append(entry["name"])
+    elif kind == "Service":
+        entry["service_type"] = _str(spec.get("type")) or "ClusterIP"
+    elif kind == "ConfigMap":
+        # embedded cloudflared config: every routed hostname is reachable from the internet
+        for v in _map(doc.get("data")).values():
+            if isinstance(v, str) and "ingress:" in v:
+                try:
+                    cfg = yaml.safe_load(v)
+                except yaml.YAMLError:
+                    continue
+                if isinstance(cfg, dict):
+                    entry["tunnel_hosts"] += [r["hostname"] for r in _list(cfg.get("ingress")) if isinstance(r, dict) and _str(r.get("hostname"))]
+    return entry
+
+def index_manifest(text:str) -> Dict[str, Any]:
+    """Parse one YAML file into {"docs": [...], "error": str|None, "skipped": [str]}.
+
+    A document that parses but cannot be indexed (an odd shape index_doc did not expect)
+    is left out and noted in "skipped" rather than failing the file. Runs in worker processes.
+    """
+    docs: List[Dict[str, Any]] = []
+    skipped: List[str] = []
+    try:
+        for n, d in enumerate(yaml.safe_load_all(text), 1):
+            if not isinstance(d, dict):
+                continue
+            try:
+                docs.append(index_doc(d))
+            except (AttributeError, KeyError, TypeError, ValueError) as e:
+                skipped.append(f"document {n}: {type(e).__name__}: {e}")
+        return {"docs":docs, "error":None, "skipped":skipped}
+    except yaml.YAMLError as e:
+        return {"docs":[], "error":" ".join(str(e).split()), "skipped":[]}
+
+def manifest_index(root:Path, cache_path:Optional[Path]=None, jobs:Optional[int]=None) -> Tuple[Dict[str, Dict[str, Any]], int]:
+    """Index every *.yaml/*.yml under root; returns ({relpath: index}, files parsed).
+
+    Results are cached by content hash, so only new or edited files are re-parsed, and
+    those are spread over a process pool (YAML parsing is CPU-bound). A cache written by
+    a different INDEXER is ignored.
+    """
+    try:
+        saved = json.loads(cache_path.read_text()) if cache_path else {}
+    except (OSError, ValueError):
+        saved = {}
+    stale = not isinstance(saved, dict) or saved.get("indexer") != INDEXER
+    cache: Dict[str, Any] = {} if stale else saved.get("entries") or {}
+    files = sorted(p for p in root.rglob("*") if p.suffix in (".yaml",".yml") and p.is_file())
+    digests: Dict[str, str] = {}
+    misses: Dict[str, str] = {}
+    for p in files:
+        text = p.read_text(encoding="utf-8", errors="replace")
+        h = hashlib.sha256(text.encode()).hexdigest()
+        digests[str(p.relative_to(root))] = h
+        if h not in cache:
+            misses[h] = text
+    pending = dict(misses)
+    if len(pending) > 4:
+        try:
+            with ProcessPoolExecutor(max_workers=min(len(pending), jobs or os.cpu_count() or 1)) as ex:
+                cache.update(zip(pending, ex.map(index_manifest, pending.values(), chunksize=4)))
+            pending = {}
+        except (OSError, RuntimeError):  # no usable process pool (sandbox, stdin-run script)
+            pass
+    cache.update({h: index_manifest(t) for h, t in pending.items()})
+    if cache_path is not None and (stale or misses or len(cache) != len(set(digests.values()))):
+        live = {h: cache[h] for h in digests.values()}
+        cache_path.parent.mkdir(parents=True, exist_ok=True)
+        cache_path.write_text(json.dumps({"indexer":INDEXER, "entries":live}))
+    return {rel: cache[h] for rel, h in digests.items()}, len(misses)
+
+def check_manifests(root:Path, cache_path:Optional[Path]=None) -> List[Tuple[str, Dict[str,str]]]:
+    rows: List[Tuple[str, Dict[str,str]]] = []
+    if yaml is None:
+        rows.append(("manifests", status(None, warn=True, msg="PyYAML not installed; manifest lint skipped", fix="python3 -m pip install pyyaml")))
+        return rows
+    if not root.is_dir():
+        rows.append(("manifests", status(skip=True, msg=f"{root} not found")))
+        return rows
+    index, parsed = manifest_index(root, cache_path)
+    docs = [(rel, d) for rel, ix in index.items() for d in ix["docs"]]
+    rows.append(("manifests", status(True, msg=f"{len(index)} files, {len(docs)} docs indexed ({parsed} parsed, {len(index)-parsed} cached)")))
+    for rel, ix in index.items():
+        if ix["error"]:
+            rows.append((f"yaml:{rel}", status(False, msg=ix["error"], fix="Fix the YAML syntax")))
+        elif ix["skipped"]:
+            rows.append((f"yaml:{rel}", status(None, warn=True, msg="not indexed: " + "; ".join(ix["skipped"]),
+                                               fix="Check the document's shape; lint results for this file are incomplete")))
+
+    # public exposure of ports that must stay internal
+    tunnel = {h for _, d in docs for h in d["tunnel_hosts"]}
+    public_hosts: Set[str] = set(tunnel)
+    for rel, d in docs:
+        for r in d["routes"]:
+            host = r["host"]
+            public = host in tunnel or (bool(host) and not host.endswith(PRIVATE_SUFFIXES))
+            if not public:
+                continue
+            public_hosts.add(host)
+            if r["port"] in PRIVATE_PORTS:
+                desc = KNOWN_PORTS[r["port"]]
+                msg = f"{desc} (port {r['port']}) routed from public host via {rel}"
+                if d["auth"]:
+                    rows.append((f"public:{host}", status(None, warn=True, msg=msg + " (auth middleware set)", fix="Prefer keeping it internal; verify the middleware enforces SSO")))
+                else:
+                    rows.append((f"public:{host}", status(False, msg=msg, fix="Remove the public Ingress/tunnel route or put it behind oauth2-proxy")))
+        if d["service_type"] in ("LoadBalancer","NodePort"):
+            for p in sorted(set(d["ports"]) & PRIVATE_PORTS):
+                rows.append((f"service:{d['name']}:{p}", status(False, msg=f"{KNOWN_PORTS[p]} exposed by {d['service_type']} Service in {rel}", fix="Use ClusterIP and reach it via port-forward")))
+    rows.append(("public-hosts", status(True, msg=", ".join(sorted(public_hosts)) or "none")))
+
+    # ExternalSecret -> (Cluster)SecretStore references
+    stores = {(s["kind"], s["name"]) for _, d in docs for s in d["stores"]}
+    refs = [(rel, d, r) for rel, d in docs for r in d["store_refs"]]
+    missing = [(rel, d, r) for rel, d, r in refs if (r["kind"], r["name"]) not in stores]
+    for rel, d, r in missing:
+        rows.append((f"secret-store:{d['name']}", status(False, msg=f"{rel} references {r['kind']} '{r['name']}' which is not defined under {root}", fix="Define the store (deploy/eso) or fix secretStoreRef")))
+    if refs and not missing:
+        rows.append(("external-secrets", status(True, msg=f"{len(refs)} ExternalSecrets -> " + ", ".join(sorted({n for _, n in stores})))))
+
+    # Secrets consumed by charts/manifests but produced by nothing in the tree
+    produced = {n for _, d in docs for n in d["secret_produces"]}
+    consumers: Dict[str, Set[str]] = {}
+    for rel, d in docs:
+        for n in d["secret_refs"]:
+            consumers.setdefault(n, set()).add(rel)
+    for name in sorted(set(consumers) - produced):
+        rows.append((f"secret:{name}", status(None, warn=True, msg=f"used by {', '.join(sorted(consumers[name]))} but not produced by any ExternalSecret/Certificate/Secret", fix="Create it via an ExternalSecret from Vault, or document the manual step")))
+    return rows
+
+# local file reads only, so it runs in dry-run too
+@check(SECTION, "manifests", dry_ok=True)
+def manifests(ctx:Context) -> List[Tuple[str, Dict[str,str]]]:
+    root = Path(getattr(ctx.args, "deploy_dir", None) or DEPLOY_DIR)
+    return check_manifests(root, None if ctx.outdir is None else ctx.outdir/".cache"/"manifests.json")
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Fleet readiness audit: run audit_readiness.py on many nodes concurrently and merge the
+reports into fleet.json (per-node sections) and fleet.md (node x check matrix).
+
+The audit script is streamed to each target over stdin (`python3 - --out -`), so nothing
+has to be installed on the nodes beyond python3. Inventory (JSON, or YAML with pyyaml):
+
+    {"nodes": [
+      {"name": "wsl",    "transport": "local"},
+      {"name": "k3s-1",  "transport": "ssh", "host": "ubuntu@10.0.0.11"},
+      {"name": "k3s-2",  "transport": "kubectl-debug", "node": "k3s-2"},
+      {"name": "canned", "transport": "fake", "report": "tools/audit/reports/readiness.json"}
+    ]}
+
+`kubectl-debug` runs the audit in a node debug pod (sysadmin profile: host network and
+PID namespaces); the completed pods are left for `kubectl delete pod` to clean up.
+Extra per-node "args" are appended to the audit command line.
+
+No third-party deps. Python 3.8+.
+"""
+import argparse, json, subprocess, sys, time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping
+
+HERE = Path(__file__).resolve().parent
+AUDIT_SCRIPT = HERE/"audit_readiness.py"
+AUDIT_ARGS = ["--out", "-", "--format", "json"]
+BADGES = {"PASS":"✅","WARN":"⚠️","FAIL":"❌","TIMEOUT":"⏱️","SKIP":"⏭️"}
+
+# -------- transports --------
+# A transport takes (node entry, timeout) and returns the node's readiness report dict.
+def _stream_audit(cmd:List[str], timeout:float) -> dict:
+    p = subprocess.run(cmd, input=AUDIT_SCRIPT.read_text(), capture_output=True, text=True, timeout=timeout)
+    lines = p.stdout.strip().splitlines()
+    if not lines:
+        raise RuntimeError((p.stderr.strip() or f"exit {p.returncode}, no output").splitlines()[-1])
+    return json.loads(lines[-1])
+
+def transport_local(node:Mapping, timeout:float) -> dict:
+    return _stream_audit([sys.executable, "-"] + AUDIT_ARGS + node.get("args", []), timeout)
+
+def transport_ssh(node:Mapping, timeout:float) -> dict:
+    ssh = ["ssh", "-o", "BatchMode=yes", "-o", "ConnectTimeout=10"] + node.get("ssh_options", [])
+    return _stream_audit(ssh + [node["host"], "python3", "-"] + AUDIT_ARGS + node.get("args", []), timeout)
+
+def transport_kubectl_debug(node:Mapping, timeout:float) -> dict:
+    cmd = ["kubectl", "debug", f"node/{node.get('node', node['name'])}", "-i", "--quiet",
+           "--profile=sysadmin", f"--image={node.get('image', 'python:3.12-slim')}",
+           "--", "python3", "-"] + AUDIT_ARGS + node.get("args", [])
+    return _stream_audit(cmd, timeout)
+
+def transport_fake(node:Mapping, timeout:float) -> dict:
+    """Canned report for tests and demos: `report` file (or inline dict), optional `delay`/`error`."""
+    time.sleep(float(node.get("delay", 0)))
+    if node.get("error"):
+        raise RuntimeError(node["error"])
+    report = node.get("report", {})
+    return report if isinstance(report, dict) else json.loads(Path(report).read_text())
+
+TRANSPORTS: Dict[str, Callable[[Mapping, float], dict]] = {
+    "local": transport_local,
+    "ssh": transport_ssh,
+    "kubectl-debug": transport_kubectl_debug,
+    "fake": transport_fake,
+}
+
+# -------- merge --------
+def audit_node(node:Mapping, timeout:float) -> dict:
+    started = time.monotonic()
+    try:
+        report = TRANSPORTS[node.get("transport", "local")](node, timeout)
+        result = {"ok": True, "summary": report.get("summary", {}), "sections": report.get("sections", {}),
+                  "generated_at": report.get("generated_at")}
+    except Exception as e:
+        result = {"ok": False, "error": str(e) or type(e).__name__, "summary": {}, "sections": {}}
+    result["seconds"] = round(time.monotonic() - started, 3)
+    return result
+
+def merge(nodes:Mapping[str, dict]) -> dict:
+    total = {"PASS":0,"WARN":0,"FAIL":0,"TIMEOUT":0,"SKIP":0}
+    for r in nodes.values():
+        for lvl, n in r["summary"].items():
+            total[lvl] = total.get(lvl, 0) + n
+    return {
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "summary": total,
+        "unreachable": sorted(n for n, r in nodes.items() if not r["ok"]),
+        "nodes": dict(nodes),
+    }
+
+def to_markdown(fleet:Mapping, order:List[str]) -> str:
+    names = [n for n in order if n in fleet["nodes"]]
+    nodes = fleet["nodes"]
+    lines: List[str] = []
+    s = fleet["summary"]
+    lines.append(f"# Homelab Fleet Readiness Report\nGenerated: {fleet['generated_at']}\n")
+    lines.append(f"**Summary ({len(names)} nodes):** ✅ {s['PASS']}  ⚠️ {s['WARN']}  ❌ {s['FAIL']}  ⏱️ {s['TIMEOUT']}  ⏭️ {s['SKIP']}\n")
+    lines.append("## Nodes")
+    lines.append("| Node | Reachable | ✅ | ⚠️ | ❌ | ⏱️ | ⏭️ | Seconds |")
+    lines.append("|---|---|---|---|---|---|---|---|")
+    for n in names:
+        r = nodes[n]
+        reach = "yes" if r["ok"] else f"no: {r['error'].replace('|','/')}"
+        sm = r["summary"]
+        lines.append(f"| `{n}` | {reach} | {sm.get('PASS',0)} | {sm.get('WARN',0)} | {sm.get('FAIL',0)} | {sm.get('TIMEOUT',0)} | {sm.get('SKIP',0)} | {r['seconds']} |")
+    lines.append("")
+    # node x check matrix, rows in first-seen order across nodes
+    rows: Dict[str, Dict[str, str]] = {}
+    for n in names:
+        for sec, items in nodes[n]["sections"].items():
+            for it in items:
+                rows.setdefault(f"{sec} / {it['check']}", {})[n] = it["level"]
+    lines.append("## Check matrix")
+    lines.append("| Check | " + " | ".join(f"`{n}`" for n in names) + " |")
+    lines.append("|---|" + "---|"*len(names))
+    for check, levels in rows.items():
+        cells = [BADGES.get(levels.get(n, ""), "·") for n in names]
+        lines.append(f"| {check.replace('|','/')} | " + " | ".join(cells) + " |")
+    lines.append("")
+    return "\n".join(lines)
+
+def write_fleet(outdir:Path, fleet:Mapping, order:List[str]) -> None:
+    (outdir/"fleet.json").write_text(json.dumps(fleet, indent=2))
+    (outdir/"fleet.md").write_text(to_markdown(fleet, order))
+
+# -------- main --------
+def load_inventory(path:str) -> List[dict]:
+    if path.endswith(('.yaml','.yml')):
+        try:
+            import yaml
+        except ImportError:
+            print("Install pyyaml or convert the inventory to JSON.", file=sys.stderr); sys.exit(1)
+        inv = yaml.safe_load(open(path))
+    else:
+        inv = json.load(open(path))
+    nodes = inv.get("nodes", []) if isinstance(inv, dict) else inv
+    for n in nodes:
+        if n.get("transport", "local") not in TRANSPORTS:
+            print(f"{n.get('name')}: unknown transport {n.get('transport')!r} (have: {', '.join(TRANSPORTS)})", file=sys.stderr); sys.exit(1)
+    return nodes
+
+def parse_args():
+    ap = argparse.ArgumentParser()
+    ap.add_argument("inventory", help="inventory file (JSON, or YAML with pyyaml)")
+    ap.add_argument("--out", default="tools/audit/reports", help="output directory for fleet.json / fleet.md")
+    ap.add_argument("--concurrency", type=int, default=8, help="max nodes audited at once")
+    ap.add_argument("--timeout", type=float, default=300, help="per-node timeout in seconds")
+    ap.add_argument("--strict", action="store_true", help="exit nonzero if any node is unreachable or has a FAIL")
+    return ap.parse_args()
+
+def main():
+    args = parse_args()
+    outdir = Path(args.out); outdir.mkdir(parents=True, exist_ok=True)
+    inventory = load_inventory(args.inventory)
+    order = [n["name"] for n in inventory]
+    results: Dict[str, dict] = {}
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency), thread_name_prefix="node") as ex:
+        futures = {ex.submit(audit_node, n, args.timeout): n["name"] for n in inventory}
+        # Stream: report each node as it lands and keep the merged files current.
+        for fut in as_completed(futures):
+            name = futures[fut]
+            results[name] = r = fut.result()
+            if r["ok"]:
+                sm = r["summary"]
+                print(f"[fleet] {name}: ✅ {sm.get('PASS',0)} ⚠️ {sm.get('WARN',0)} ❌ {sm.get('FAIL',0)} ⏱️ {sm.get('TIMEOUT',0)} ({r['seconds']}s)", flush=True)
+            else:
+                print(f"[fleet] {name}: unreachable ({r['error']})", flush=True)
+            write_fleet(outdir, merge(results), order)
+    fleet = merge(results)
+    write_fleet(outdir, fleet, order)
+    if args.strict and (fleet["unreachable"] or fleet["summary"]["FAIL"] + fleet["summary"]["TIMEOUT"] > 0):
+        sys.exit(2)
+
+if __name__=="__main__":
+    main()
@@ -1,10 +1,94 @@
 #!/usr/bin/env python3
-import argparse, ipaddress, subprocess, re, sys, os, textwrap
+import argparse, ipaddress, json, subprocess, re, sys, os, textwrap
 
 def sh(cmd):
     return subprocess.check_output(cmd, shell=True, text=True).strip()
 
-def detect_default_ipv4():
+RTF_UP, RTF_GATEWAY = 0x1, 0x2
+
+def _le32(h):
+    # /proc/net/route stores IPv4 addresses as host-order (little-endian) 32-bit hex
+    return ipaddress.IPv4Address(int(h, 16).to_bytes(4, sys.byteorder))
+
+def proc_ipv4_routes(path="/proc/net/route"):
+    """Rows of /proc/net/route as dicts (dev, dst, gw, mask, flags, metric)."""
+    routes = []
+    with open(path) as f:
+        next(f, None)
+        for line in f:
+            p = line.split()
+            if len(p) < 8:
+                continue
+            routes.append({"dev":p[0], "dst":_le32(p[1]), "gw":_le32(p[2]), "flags":int(p[3], 16),
+                           "metric":int(p[6]), "mask":_le32(p[7])})
+    return routes
+
+def fib_local_ipv4(path="/proc/net/fib_trie"):
+    """Local (host) IPv4 addresses from the kernel FIB trie, without forking `ip`."""
+    addrs, last = set(), None
+    with open(path) as f:
+        for line in f:
+            t = line.strip()
+            if t.startswith("|--"):
+                last = t[3:].strip()
+            elif last and t.startswith("/32 host LOCAL"):
+                addrs.add(ipaddress.IPv4Address(last))
+    return sorted(a for a in addrs if not a.is_loopback)
+
+def ipv6_addrs(path="/proc/net/if_inet6"):
+    """{dev: [(IPv6Address, prefixlen)]} for global-scope addresses."""
+    out = {}
+    with open(path) as f:
+        for line in f:
+            p = line.split()
+            if len(p) == 6 and p[3] == "00":
+                out.setdefault(p[5], []).append((ipaddress.IPv6Address(int(p[0], 16)), int(p[2], 16)))
+    return out
+
+def proc_ipv6_defaults(path="/proc/net/ipv6_route"):
+    defaults = []
+    with open(path) as f:
+        for line in f:
+            p = line.split()
+            if len(p) < 10 or int(p[0], 16) or int(p[1], 16):
+                continue
+            flags = int(p[8], 16)
+            if flags & RTF_UP and flags & RTF_GATEWAY:
+                defaults.append({"gw":ipaddress.IPv6Address(int(p[4], 16)), "dev":p[9], "metric":int(p[5], 16)})
+    return defaults
+
+def default_routes():
+    """All default routes (IPv4 then IPv6, each by metric) read from procfs.
+
+    Each entry: {"family", "gw", "dev", "metric", "ip", "prefixlen"}; "ip"/"prefixlen" is the
+    address on `dev` whose connected subnet contains the gateway (empty if none found).
+    """
+    v4 = proc_ipv4_routes()
+    local = fib_local_ipv4()
+    out = []
+    for r in sorted(v4, key=lambda r: r["metric"]):
+        if int(r["dst"]) or int(r["mask"]) or not (r["flags"] & RTF_UP and r["flags"] & RTF_GATEWAY):
+            continue
+        ip, plen = "", 0
+        # connected routes on the same device tell us which local address sits next to the gateway
+        for link in v4:
+            if link["dev"] != r["dev"] or link["flags"] & RTF_GATEWAY or not int(link["mask"]):
+                continue
+            net = ipaddress.IPv4Network(f"{link['dst']}/{link['mask']}")
+            cand = [a for a in local if a in net]
+            if cand and r["gw"] in net:
+                ip, plen = str(cand[0]), net.prefixlen
+                break
+        out.append({"family":4, "gw":str(r["gw"]), "dev":r["dev"], "metric":r["metric"], "ip":ip, "prefixlen":plen})
+    v6 = ipv6_addrs()
+    for r in sorted(proc_ipv6_defaults(), key=lambda r: r["metric"]):
+        addrs = v6.get(r["dev"], [])
+        ip, plen = (str(addrs[0][0]), addrs[0][1]) if addrs else ("", 0)
+        out.append({"family":6, "gw":str(r["gw"]), "dev":r["dev"], "metric":r["metric"], "ip":ip, "prefixlen":plen})
+    return out
+
+def detect_default_ipv4_ip():
+    """Fallback: parse `ip route` output (needs iproute2 and a shell)."""
     out = sh("ip -4 route show default || true")
     m = re.search(r"default via (\d+\.\d+\.\d+\.\d+) dev (\S+)(?:.*?src (\d+\.\d+\.\d+\.\d+))?", out)
     if m:
@@ -18,44 +102,181 @@ def detect_default_ipv4():
         return {"gw":gw, "dev":dev, "ip":src}
     return {"gw":"", "dev":"", "ip":""}
 
-def choose_pool(cidr, host_ip):
+def detect_default_ipv4():
+    """Lowest-metric IPv4 default route from procfs; falls back to `ip` parsing."""
+    try:
+        for r in default_routes():
+            if r["family"] == 4 and r["ip"]:
+                return {"gw":r["gw"], "dev":r["dev"], "ip":r["ip"], "prefixlen":r["prefixlen"]}
+    except (OSError, ValueError):
+        pass
+    return detect_default_ipv4_ip()
+
+def parse_range(text):
+    """'a-b', a CIDR or a single address -> (first, last) as ints."""
+    text = text.strip()
+    if "-" in text:
+        lo, hi = text.split("-", 1)
+        return int(ipaddress.ip_address(lo.strip())), int(ipaddress.ip_address(hi.strip()))
+    net = ipaddress.ip_network(text, strict=False)
+    return int(net.network_address), int(net.broadcast_address)
+
+def metallb_pools(file_path):
+    """Address ranges under every `addresses:` list in the MetalLB manifest, in file order."""
+    pools, in_list = [], False
+    try:
+        lines = open(file_path).read().splitlines()
+    except OSError:
+        return pools
+    for line in lines:
+        t = line.strip()
+        if t.startswith("addresses:"):
+            in_list = True
+        elif in_list and t.startswith("-"):
+            try:
+                pools.append(parse_range(t[1:].strip().strip("'\"")))
+            except ValueError:
+                pass
+        elif t:
+            in_list = False
+    return pools
+
+def arp_neighbors(path="/proc/net/arp"):
+    """IPv4 addresses with a complete ARP entry (flags 0x2), i.e. hosts seen on the LAN."""
+    out = []
+    try:
+        with open(path) as f:
+            next(f, None)
+            for line in f:
+                p = line.split()
+                if len(p) >= 3 and int(p[2], 16) & 0x2:
+                    out.append(p[0])
+    except OSError:
+        pass
+    return out
+
+def merge_ranges(ranges):
+    merged = []
+    for lo, hi in sorted(ranges):
+        if merged and lo <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], hi)
+        else:
+            merged.append([lo, hi])
+    return merged
+
+def choose_pool(cidr, host_ip, size=11, reserved=(), current=None, neighbors=()):
+    """Pick a free `size`-address range inside `cidr`, working only with integer intervals.
+
+    `reserved` holds (first, last) int ranges to avoid (gateway, other pools); the host IP is
+    always reserved. `neighbors` are ranges seen in use on the LAN (ARP): a new range avoids
+    them, but they never move `current` (first, last), which is kept when it still fits and
+    clears `reserved`, so re-running is idempotent -- MetalLB's own speakers answer ARP for
+    the pool. Otherwise the highest free gap wins, capped at .250 on a /24 (the old .240-.250
+    default) and at the last usable address elsewhere.
+    Cost is O(R log R) in the number of reserved ranges, independent of the subnet size,
+    so /8s and IPv6 /64s are fine.
+
+    >>> ip = lambda a: int(ipaddress.ip_address(a))
+    >>> choose_pool("192.168.1.0/24", "192.168.1.10", neighbors=[(ip("192.168.1.245"),)*2],
+    ...             current=(ip("192.168.1.240"), ip("192.168.1.250")))
+    '192.168.1.240-192.168.1.250'
+    >>> choose_pool("192.168.1.0/24", "192.168.1.10", neighbors=[(ip("192.168.1.245"),)*2])
+    '192.168.1.234-192.168.1.244'
+    >>> choose_pool("192.168.1.0/24", "192.168.1.10", reserved=[(ip("192.168.1.245"),)*2],
+    ...             current=(ip("192.168.1.240"), ip("192.168.1.250")))
+    '192.168.1.234-192.168.1.244'
+    >>> choose_pool("10.0.1.0/28", "10.0.0.5", reserved=[(ip("10.0.1.10"), ip("10.0.1.14"))])
+    Traceback (most recent call last):
+    ValueError: no free range of 11 addresses in 10.0.1.0/28
+    """
+    if size < 1:
+        raise ValueError(f"pool size must be at least 1, got {size}")
     net = ipaddress.ip_network(cidr, strict=False)
-    hosts = list(net.hosts())
-    if net.prefixlen == 24 and len(hosts) >= 250:
-        start = ipaddress.ip_address(int(net.network_address) + 240)
-        end   = ipaddress.ip_address(int(net.network_address) + 250)
+    first, last = int(net.network_address), int(net.broadcast_address)
+    if net.version == 4 and net.prefixlen < 31:
+        first, last = first + 1, last - 1  # network and broadcast addresses
+    elif net.version == 6 and net.prefixlen < 127:
+        first += 1  # subnet-router anycast
+    hip = int(ipaddress.ip_address(host_ip))
+    clip = lambda ranges: [(max(lo, first), min(hi, last)) for lo, hi in ranges if hi >= first and lo <= last]
+    taken = merge_ranges(clip([(hip, hip)] + list(reserved)))
+    if current and first <= current[0] <= current[1] <= last and current[1] - current[0] + 1 == size \
+            and not any(lo <= current[1] and current[0] <= hi for lo, hi in taken):
+        lo, hi = current
     else:
-        start = hosts[-11]; end = hosts[-1]
-    hip = ipaddress.ip_address(host_ip)
-    if start <= hip <= end:
-        start = ipaddress.ip_address(int(start) - 16)
-        end   = ipaddress.ip_address(int(end) - 16)
-    return f"{start}-{end}"
+        taken = merge_ranges([tuple(r) for r in taken] + clip(neighbors))
+        ceiling = first + 249 if net.version == 4 and net.prefixlen == 24 else last
+        lo = hi = None
+        for cap in (ceiling, last):
+            # walk gaps between reserved intervals from the top down
+            top = cap
+            for r_lo, r_hi in reversed([[first - 1, first - 1]] + taken):
+                if r_lo > top:
+                    continue
+                if top - r_hi >= size:
+                    lo, hi = top - size + 1, top
+                    break
+                top = r_lo - 1
+                if top < first:
+                    break
+            if lo is not None:
+                break
+        if lo is None:
+            raise ValueError(f"no free range of {size} addresses in {net}")
+    return f"{ipaddress.ip_address(lo)}-{ipaddress.ip_address(hi)}"
 
 def patch_metallb_pool(file_path, pool):
     import re, pathlib
     p = pathlib.Path(file_path)
     txt = p.read_text()
-    new = re.sub(r"addresses:\s*\n\s*-\s*[0-9\.\-]+", f"addresses:\n    - {pool}", txt)
+    new = re.sub(r"addresses:\s*\n\s*-\s*[0-9a-fA-F\.:/\-]+", f"addresses:\n    - {pool}", txt, count=1)
     p.write_text(new)
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--pool-start", default="")
     ap.add_argument("--pool-end", default="")
-    ap.add_argument("--cidr", default="")
+    ap.add_argument("--cidr", default="", help="subnet for the pool (IPv4 or IPv6); default: host /24")
+    ap.add_argument("--pool-size", type=int, default=11, help="number of addresses in the pool")
+    ap.add_argument("--ignore-arp", action="store_true", help="do not avoid addresses seen in /proc/net/arp")
     ap.add_argument("--file", default="deploy/metallb/ipaddresspool.yaml")
     ap.add_argument("--write", action="store_true")
+    ap.add_argument("--routes", action="store_true", help="print detected default routes (IPv4 + IPv6) as JSON and exit")
     args = ap.parse_args()
+    if args.pool_size < 1:
+        ap.error("--pool-size must be at least 1")
+
+    if args.routes:
+        print(json.dumps(default_routes(), indent=2))
+        return
 
-    det = detect_default_ipv4()
+    if args.cidr and ipaddress.ip_network(args.cidr, strict=False).version == 6:
+        det = next((r for r in default_routes() if r["family"] == 6 and r["ip"]), {"gw":"", "dev":"", "ip":""})
+    else:
+        det = detect_default_ipv4()
     if not det["ip"]:
-        print("Could not detect default IPv4; specify --cidr and --pool-* manually.", file=sys.stderr)
+        print("Could not detect default route address; specify --cidr and --pool-* manually.", file=sys.stderr)
         sys.exit(1)
 
     host_ip = det["ip"]
     cidr = args.cidr or ".".join(host_ip.split(".")[:3]) + ".0/24"
-    pool = (args.pool_start and args.pool_end) and f"{args.pool_start}-{args.pool_end}" or choose_pool(cidr, host_ip)
+    if args.pool_start and args.pool_end:
+        pool = f"{args.pool_start}-{args.pool_end}"
+    else:
+        # The first pool in the file is the one we rewrite; any others must not overlap it.
+        pools = metallb_pools(args.file)
+        current, others = (pools[0], pools[1:]) if pools else (None, [])
+        reserved, neighbors = list(others), []
+        if det["gw"]:
+            gw = int(ipaddress.ip_address(det["gw"])); reserved.append((gw, gw))
+        if not args.ignore_arp:
+            neighbors = [(int(ipaddress.ip_address(a)),)*2 for a in arp_neighbors()]
+        try:
+            pool = choose_pool(cidr, host_ip, size=args.pool_size, reserved=reserved, current=current,
+                               neighbors=neighbors)
+        except ValueError as e:
+            print(f"{e}; specify --pool-start/--pool-end manually.", file=sys.stderr)
+            sys.exit(1)
     print(f"Detected host IP: {host_ip}, CIDR: {cidr}, MetalLB pool: {pool}")
     if args.write:
         patch_metallb_pool(args.file, pool)
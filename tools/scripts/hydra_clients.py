@@ -1,16 +1,85 @@
 #!/usr/bin/env python3
-import argparse, json, sys, urllib.request
-def http(method, url, data=None):
-    req = urllib.request.Request(url, method=method, headers={'Content-Type':'application/json'})
-    if data is not None:
-        req.data = json.dumps(data).encode()
-    with urllib.request.urlopen(req) as r:
-        return json.loads(r.read().decode())
+import argparse, http.client, json, re, sys, threading, time, urllib.parse
+from concurrent.futures import ThreadPoolExecutor
+
+class Hydra:
+    """Hydra admin API client with one keep-alive connection per worker thread."""
+    def __init__(self, admin, retries=3, backoff=0.5, timeout=30):
+        u = urllib.parse.urlsplit(admin)
+        self.scheme, self.netloc, self.base = u.scheme, u.netloc, u.path.rstrip('/')
+        self.retries, self.backoff, self.timeout = retries, backoff, timeout
+        self.local = threading.local()
+    def _conn(self, fresh=False):
+        c = getattr(self.local, 'conn', None)
+        if c is None or fresh:
+            if c is not None:
+                c.close()
+            cls = http.client.HTTPSConnection if self.scheme == 'https' else http.client.HTTPConnection
+            c = self.local.conn = cls(self.netloc, timeout=self.timeout)
+        return c
+    def request(self, method, path, data=None):
+        """Return (status, headers, parsed body); retries connection errors, 429 and 5xx.
+
+        A retried POST may find that an earlier attempt was applied before its response got
+        lost, so a 409 on a retry is returned (status 409, body None) rather than raised.
+        """
+        body = json.dumps(data).encode() if data is not None else None
+        url = path if path.startswith(self.base + '/') else self.base + path
+        for attempt in range(self.retries + 1):
+            try:
+                c = self._conn(fresh=attempt > 0)
+                c.request(method, url, body=body, headers={'Content-Type':'application/json', 'Connection':'keep-alive'})
+                r = c.getresponse()
+                raw = r.read()
+                if r.status == 409 and method == 'POST' and attempt > 0:
+                    return r.status, r.headers, None
+                if r.status == 429 or r.status >= 500:
+                    raise IOError(f'{method} {url}: HTTP {r.status}')
+                if r.status >= 400:
+                    raise RuntimeError(f'{method} {url}: HTTP {r.status}: {raw.decode(errors="replace")}')
+                return r.status, r.headers, json.loads(raw.decode()) if raw else None
+            except (IOError, http.client.HTTPException) as e:
+                if attempt == self.retries:
+                    raise RuntimeError(f'{method} {url}: giving up after {attempt + 1} attempts: {e}')
+                time.sleep(self.backoff * 2 ** attempt)
+    def list_clients(self, page_size=500):
+        """Follow Hydra's Link rel="next" pagination (page_token on v2, limit/offset on v1)."""
+        clients, path, seen = [], f'/clients?page_size={page_size}&limit={page_size}', set()
+        while path and path not in seen:
+            seen.add(path)
+            _, headers, page = self.request('GET', path)
+            if not page:
+                break
+            clients.extend(page)
+            m = re.search(r'<([^>]+)>;\s*rel="?next"?', headers.get('Link', ''))
+            path = None
+            if m:
+                nxt = urllib.parse.urlsplit(m.group(1))
+                path = nxt.path + ('?' + nxt.query if nxt.query else '')
+        return clients
+
+def plan(desired, existing):
+    """Split desired clients into create/update/unchanged. A client is unchanged when every
+    field it declares already matches Hydra (server-side defaults are ignored)."""
+    out = {'create': [], 'update': [], 'unchanged': []}
+    for c in desired:
+        cur = existing.get(c['client_id'])
+        if cur is None:
+            out['create'].append(c)
+        elif any(cur.get(k) != v for k, v in c.items()):
+            out['update'].append(c)
+        else:
+            out['unchanged'].append(c)
+    return out
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument('--admin', required=True)
     ap.add_argument('--domain', required=True)
     ap.add_argument('--config', required=True)
+    ap.add_argument('--plan', action='store_true', help='show what would change without writing')
+    ap.add_argument('--concurrency', type=int, default=4)
+    ap.add_argument('--retries', type=int, default=3)
     args = ap.parse_args()
     if args.config.endswith(('.yaml','.yml')):
         try:
@@ -20,13 +89,43 @@ def main():
         cfg = yaml.safe_load(open(args.config))
     else:
         cfg = json.load(open(args.config))
-    existing = {c["client_id"]: c for c in http("GET", args.admin + "/clients")}
-    for c in cfg.get("clients", []):
+    desired = cfg.get("clients", [])
+    for c in desired:
         c["redirect_uris"] = [u.replace("homelab.lan", args.domain) for u in c.get("redirect_uris", [])]
+    hydra = Hydra(args.admin, retries=args.retries)
+    try:
+        existing = {c["client_id"]: c for c in hydra.list_clients()}
+    except RuntimeError as e:
+        print(f"Could not list Hydra clients: {e}", file=sys.stderr); sys.exit(1)
+    todo = plan(desired, existing)
+    for c in todo['unchanged']:
+        print("Unchanged client:", c["client_id"])
+    if args.plan:
+        for c in todo['create']:
+            print("Would create client:", c["client_id"])
+        for c in todo['update']:
+            changed = sorted(k for k, v in c.items() if existing[c["client_id"]].get(k) != v)
+            print("Would update client:", c["client_id"], f"({', '.join(changed)})")
+        return
+    def write(op, c):
         cid = c["client_id"]
-        if cid in existing:
-            http("PUT", f"{args.admin}/clients/{cid}", c); print("Updated client:", cid)
-        else:
-            http("POST", f"{args.admin}/clients", c); print("Created client:", cid)
+        if op == 'update':
+            hydra.request("PUT", f"/clients/{urllib.parse.quote(cid, safe='')}", c); return f"Updated client: {cid}"
+        st, _, _ = hydra.request("POST", "/clients", c)
+        if st == 409:
+            # created by an attempt whose response was lost; make sure it carries this config
+            hydra.request("PUT", f"/clients/{urllib.parse.quote(cid, safe='')}", c)
+        return f"Created client: {cid}"
+    jobs = [('create', c) for c in todo['create']] + [('update', c) for c in todo['update']]
+    failed = 0
+    with ThreadPoolExecutor(max_workers=max(1, args.concurrency)) as ex:
+        for (op, c), fut in zip(jobs, [ex.submit(write, op, c) for op, c in jobs]):
+            try:
+                print(fut.result())
+            except RuntimeError as e:
+                failed += 1
+                print(f"Failed to {op} client {c['client_id']}: {e}", file=sys.stderr)
+    if failed:
+        sys.exit(1)
 if __name__ == "__main__":
     main()